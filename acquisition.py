@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Raw Image Acquisition
+"""
+import hashlib
+import json
+import mmap
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_ALGORITHMS = ('md5', 'sha1', 'sha256')
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_BUFFERS = 8
+SECTOR_SIZE = 512
+PROGRESS_INTERVAL = 0.5
+IMAGE_EXTENSIONS = {'raw': '.dd', 'fsi': '.fsi'}
+EVIDENCE_DIR = 'evidence'
+
+
+def device_size(f):
+    """Size of an open file or block device (block devices report it via seek)"""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    return size
+
+
+def raw_device_path(record):
+    """Raw source to image for a device record"""
+    if sys.platform == 'win32':
+        return '\\\\.\\' + record.device.rstrip('\\')  # e.g. \\.\E:
+    return record.device
+
+
+def sidecar_path(image_path):
+    return image_path + '.hashes.json'
+
+
+def open_source(path, direct=False):
+    """Unbuffered raw reader, with O_DIRECT where asked for and supported"""
+    flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+    if direct and hasattr(os, 'O_DIRECT'):
+        try:
+            return os.fdopen(os.open(path, flags | os.O_DIRECT), 'rb', buffering=0)
+        except OSError:
+            pass  # e.g. tmpfs; fall back to the page cache
+    return os.fdopen(os.open(path, flags), 'rb', buffering=0)
+
+
+class RawImageWriter:
+    """Plain bit-for-bit .dd output"""
+    format = 'raw'
+
+    def __init__(self, path):
+        self.file = open(path, 'wb', buffering=0)
+
+    def write(self, data):
+        self.file.write(data)
+
+    def close(self, hashes=None):
+        try:
+            os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+
+
+class ImageAcquirer:
+    """Reader -> hashers/writer pipeline over a fixed pool of preallocated buffers
+
+    Buffers are page-aligned anonymous mmaps (usable with O_DIRECT). The
+    reader hands each filled buffer to one hasher per algorithm and to the
+    writer through bounded queues; the last of them to finish returns it to
+    the free pool, so the pool size bounds memory and nothing is copied.
+    """
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, buffers=DEFAULT_BUFFERS,
+                 algorithms=DEFAULT_ALGORITHMS, sector_size=SECTOR_SIZE, direct=False, image_format='raw',
+                 writer_options=None):
+        if chunk_size % sector_size:
+            raise ValueError("chunk_size must be a multiple of sector_size")
+        self.chunk_size = chunk_size
+        self.buffer_count = buffers
+        self.algorithms = tuple(algorithms)
+        self.sector_size = sector_size
+        self.direct = direct
+        if image_format not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        self.image_format = image_format
+        self.writer_options = writer_options or {}
+
+    @property
+    def extension(self):
+        return IMAGE_EXTENSIONS[self.image_format]
+
+    def open_writer(self, destination):
+        if self.image_format == 'fsi':
+            from segmented_image import SegmentedImageWriter  # pulls in the process pool only when used
+            return SegmentedImageWriter(destination, **self.writer_options)
+        return RawImageWriter(destination)
+
+    def read_chunk(self, f, offset, view, length, bad_sectors):
+        """Fill view[:length] from offset; unreadable sectors are zeroed and logged"""
+        try:
+            f.seek(offset)
+            got = 0
+            while got < length:
+                n = f.readinto(view[got:length])
+                if not n:
+                    break
+                got += n
+            return got
+        except OSError:
+            pass
+        # Retry sector by sector so one bad sector only costs its own 512 bytes
+        for start in range(0, length, self.sector_size):
+            end = min(start + self.sector_size, length)
+            try:
+                f.seek(offset + start)
+                n = f.readinto(view[start:end])
+                if n < end - start:
+                    view[start + n:end] = bytes(end - start - n)
+            except OSError as e:
+                view[start:end] = bytes(end - start)
+                bad_sectors.append({'offset': offset + start, 'length': end - start, 'error': str(e)})
+        return length
+
+    def acquire(self, source, destination, progress=None, size=None, throttle=None):
+        """Image source to destination; writes a hash sidecar and returns the report
+
+        throttle(nbytes), if given, is called after every chunk read (see scheduler.py).
+        """
+        started = time.perf_counter()
+        started_at = datetime.now().isoformat()
+        free = queue.Queue()
+        for _ in range(self.buffer_count):
+            free.put(mmap.mmap(-1, self.chunk_size))
+        digests = [hashlib.new(name) for name in self.algorithms]
+        # One hasher per algorithm plus the writer all consume every buffer in parallel
+        stages = [queue.Queue(maxsize=self.buffer_count) for _ in range(len(digests) + 1)]
+        pending = {}  # buffer id -> consumers still using it
+        pending_lock = threading.Lock()
+        bad_sectors = []
+        errors = []
+        state = {'read': 0, 'written': 0}
+        abort = threading.Event()  # set when the writer side dies; the reader stops at the next chunk
+
+        def release(buf):
+            with pending_lock:
+                pending[id(buf)] -= 1
+                done = pending[id(buf)] == 0
+            if done:
+                free.put(buf)
+
+        with open_source(source, self.direct) as src:
+            total = size if size is not None else device_size(src)
+
+            def read(offset, view, length):
+                aligned = length - length % self.sector_size if self.direct else length
+                n = self.read_chunk(src, offset, view, aligned, bad_sectors) if aligned else 0
+                if n < aligned or aligned == length:
+                    return n
+                # O_DIRECT only takes whole sectors: read the unaligned tail through the page cache
+                with open_source(source) as tail:
+                    return n + self.read_chunk(tail, offset + n, view[n:], length - n, bad_sectors)
+
+            def reader():
+                try:
+                    offset = 0
+                    while offset < total and not abort.is_set():
+                        buf = free.get()
+                        length = min(self.chunk_size, total - offset)
+                        n = read(offset, memoryview(buf), length)
+                        if n == 0:
+                            free.put(buf)
+                            break
+                        if throttle:
+                            throttle(n)
+                        pending[id(buf)] = len(stages)
+                        for stage in stages:
+                            stage.put((buf, n))
+                        offset += n
+                        state['read'] = offset
+                        if n < length:
+                            break  # device shorter than reported
+                except Exception as e:
+                    errors.append(f"read: {e}")
+                for stage in stages:
+                    stage.put(None)
+
+            def hasher(digest, stage):
+                while True:
+                    item = stage.get()
+                    if item is None:
+                        break
+                    buf, n = item
+                    with memoryview(buf) as view:
+                        digest.update(view[:n])  # hashlib drops the GIL for large updates
+                    release(buf)
+
+            out = self.open_writer(destination)
+            threads = [threading.Thread(target=reader, name='acquire-read', daemon=True)]
+            threads += [threading.Thread(target=hasher, args=(digest, stage), name=f'acquire-{digest.name}', daemon=True)
+                        for digest, stage in zip(digests, stages)]
+            for thread in threads:
+                thread.start()
+
+            # Writer runs here: it also owns progress reporting
+            last_report = 0
+            writes = stages[-1]
+            drained = False
+            try:
+                while True:
+                    item = writes.get()
+                    if item is None:
+                        drained = True
+                        break
+                    buf, n = item
+                    try:
+                        if not errors:
+                            try:
+                                with memoryview(buf) as view:
+                                    out.write(view[:n])
+                                state['written'] += n
+                            except OSError as e:
+                                errors.append(f"write: {e}")
+                                abort.set()  # the image is incomplete: stop reading the rest of the device
+                    finally:
+                        release(buf)  # keep draining after a write error so the reader never blocks
+                    now = time.perf_counter()
+                    if progress and now - last_report >= PROGRESS_INTERVAL:
+                        last_report = now
+                        progress(self.stats(state['written'], total, now - started))
+            finally:
+                if not drained:
+                    # Writer or progress callback raised: stop the reader and consume what it
+                    # already queued so it can reach its sentinel instead of blocking on a full stage
+                    abort.set()
+                    while True:
+                        item = writes.get()
+                        if item is None:
+                            break
+                        release(item[0])
+                for thread in threads:
+                    thread.join()
+                hashes = {name: d.hexdigest() for name, d in zip(self.algorithms, digests)}
+                try:
+                    out.close(hashes)
+                except OSError as e:
+                    errors.append(f"close: {e}")
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'source': source,
+            'image': destination,
+            'format': out.format,
+            'size': total,
+            'bytes': state['written'],
+            'complete': state['written'] == total and not errors,
+            'hashes': hashes,
+            'bad_sectors': bad_sectors,
+            'errors': errors,
+            'chunk_size': self.chunk_size,
+            'sector_size': self.sector_size,
+            'started': started_at,
+            'finished': datetime.now().isoformat(),
+            'elapsed': elapsed,
+            'mb_per_s': state['written'] / (1024 * 1024) / elapsed if elapsed > 0 else 0,
+        }
+        if progress:
+            progress(self.stats(state['written'], total, elapsed))
+        with open(sidecar_path(destination), 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    @staticmethod
+    def stats(done, total, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0
+        return {
+            'bytes': done,
+            'total': total,
+            'percent': done * 100 / total if total else 100.0,
+            'mb_per_s': rate / (1024 * 1024),
+            'eta': (total - done) / rate if rate > 0 else None,
+        }
+
+
+def format_progress(stats):
+    eta = f"{stats['eta']:.0f}s" if stats['eta'] is not None else "?"
+    return (f"{stats['bytes'] / 1024 / 1024:.0f}/{stats['total'] / 1024 / 1024:.0f} MB "
+            f"({stats['percent']:.1f}%) {stats['mb_per_s']:.1f} MB/s ETA {eta}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: acquisition.py <device-or-file> <image.dd|image.fsi> [--direct] [--segmented]")
+        sys.exit(1)
+    source, destination = sys.argv[1], sys.argv[2]
+    print(f"💽 Imaging {source} -> {destination}...")
+    acquirer = ImageAcquirer(direct='--direct' in sys.argv,
+                             image_format='fsi' if '--segmented' in sys.argv else 'raw')
+    result = acquirer.acquire(source, destination, progress=lambda s: print(f"\r   {format_progress(s)}", end=''))
+    print()
+    for name, digest in result['hashes'].items():
+        print(f"   {name}: {digest}")
+    if result['bad_sectors']:
+        print(f"   ⚠️ {len(result['bad_sectors'])} unreadable sectors (zero-filled, offsets in sidecar)")
+    if result['complete']:
+        print(f"✅ Image complete: {result['bytes']} bytes in {result['elapsed']:.2f}s ({result['mb_per_s']:.1f} MB/s)")
+    else:
+        print(f"❌ Image incomplete: {result['bytes']}/{result['size']} bytes {result['errors']}")
+        sys.exit(2)
@@ -3,40 +3,103 @@
 Forensic Shield - Web Dashboard
 COMPLETE WORKING VERSION
 """
-from flask import Flask, render_template, jsonify, Response
+from flask import Flask, render_template, jsonify, Response, request, g
 from datetime import datetime
 import json
+import os
+import re
+import sqlite3
 import time
 import random
 import threading
+from acquisition import EVIDENCE_DIR
+from broadcaster import LogBroadcaster
+from indexer import CATALOG_DIR, Catalog, catalog_path
+from log_store import LogStore, format_record
+from log_export import FORMATS, encode, filter_records, parse_time, render
+from metrics import CONTENT_TYPE, HTTP_DURATION, REGISTRY, SSE_CLIENTS, UPTIME
+from protector import FAILED, REMOVED
+from search import DEFAULT_MAX_HITS, KeywordSearcher
+from state_store import StateStore
 
 app = Flask(__name__)
 
-# Simple storage
-protection_status = {
+# Bounded in-memory tail + full on-disk history
+log_store = LogStore()
+log_lock = threading.Lock()
+
+def log_backfill(after_id, before_id, limit):
+    """Older log events for SSE clients resuming from beyond the broadcaster's window"""
+    start = max(after_id + 1, before_id - limit)
+    return [(record['seq'], {'log': format_record(record)}) for record in log_store.iter_range(start, before_id)]
+
+# One hub for every live viewer; publishers never touch client connections
+broadcaster = LogBroadcaster(backfill=log_backfill)
+SSE_KEEPALIVE = 15
+
+# Versioned copy-on-write state; readers never take a lock
+status_store = StateStore({
     'devices': [],
-    'logs': [],
     'last_update': datetime.now().isoformat(),
     'threats_blocked': 0,
-    'system_health': 100
-}
+    'system_health': 100,
+    'device_states': {}
+})
+STARTED_AT = datetime.now().strftime('%H:%M:%S')
+STARTED_MONOTONIC = time.monotonic()
+UPTIME.set_function(lambda: time.monotonic() - STARTED_MONOTONIC)
+SSE_CLIENTS.set_function(broadcaster.client_count)
+
+def health_percent(device_states):
+    """Share of tracked devices not in the failed state (100 with none tracked)"""
+    if not device_states:
+        return 100
+    healthy = sum(1 for state in device_states.values() if state['state'] != FAILED)
+    return round(100 * healthy / len(device_states))
+
+def format_uptime(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h {minutes}m" if days else f"{hours}h {minutes}m {seconds}s"
+
+def json_response(name, build, variant=None):
+    """Serve a snapshot-cached JSON body with an ETag; unchanged polls get a bodiless 304"""
+    snapshot = status_store.get()
+    etag = f"{snapshot.version}" if variant is None else f"{snapshot.version}-{variant}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.render(name, build, variant), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate, never serve stale
+    return response
+
+def add_log(message, level='INFO', device=None):
+    """Store a log record and push it to live viewers (SSE id = log sequence number)"""
+    with log_lock:
+        record = log_store.append(message, level, device)
+        line = format_record(record)
+        broadcaster.publish({'log': line}, event_id=record['seq'])
+    return line
+
+def recent_logs(count=20):
+    return [format_record(record) for record in log_store.tail(count)]
 
 # Add initial logs
-protection_status['logs'].extend([
+for message in [
     "🛡️ Forensic Shield Enterprise Started",
     "🔍 Initializing USB protection system...",
     "✅ Write protection engine ready",
     "📊 Monitoring all USB ports...",
     "🔒 Forensic integrity monitoring ACTIVE"
-])
+]:
+    add_log(message)
 
 # Background thread for live data
 def update_live_status():
     while True:
         try:
-            # Simulate system health fluctuations
-            protection_status['system_health'] = random.randint(95, 100)
-            
             # Add occasional system status updates
             if random.random() > 0.8:
                 status_updates = [
@@ -46,8 +109,7 @@ def update_live_status():
                     "🔍 Scanning for new devices",
                     "⚡ Performance optimization active"
                 ]
-                timestamp = datetime.now().strftime('%H:%M:%S')
-                protection_status['logs'].append(f"[{timestamp}] {random.choice(status_updates)}")
+                add_log(random.choice(status_updates))
                 
         except Exception as e:
             print(f"Live update error: {e}")
@@ -58,63 +120,252 @@ def update_live_status():
 live_thread = threading.Thread(target=update_live_status, daemon=True)
 live_thread.start()
 
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_duration(response):
+    # Route pattern, not the raw path, keeps the label set bounded
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_DURATION.labels(endpoint).observe(time.perf_counter() - g.started)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of every collector in this process"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/api/status')
 def get_status():
-    return jsonify(protection_status)
+    def build(data):
+        status = dict(data)
+        status['logs'] = recent_logs()
+        return status
+    # Recent logs are part of the body, so the newest log seq is part of the ETag
+    return json_response('status', build, variant=log_store.last_seq())
+
+def build_devices(data):
+    # Return current devices or demo data
+    if data['devices']:
+        return data['devices']
+    return [{
+        'drive': 'D:\\',
+        'status': 'READY',
+        'connected_at': STARTED_AT,
+        'protection': 'ACTIVE',
+        'files_accessible': '0 files (no device)'
+    }]
 
 @app.route('/api/devices')
 def get_devices():
-    # Return current devices or demo data
-    if protection_status['devices']:
-        devices = protection_status['devices']
+    return json_response('devices', build_devices)
+
+def build_protection_status(data):
+    """Dashboard protection metrics derived from the connected devices"""
+    devices = data['devices']
+    protected = any(device.get('write_protected') for device in devices)
+    if protected:
+        access, integrity = 'BLOCKED', 'ACTIVE'
+    elif devices:
+        access, integrity = 'ALLOWED', 'AT RISK'
+    else:
+        access, integrity = 'NOT CONNECTED', 'READY'
+    return {
+        'usb_connected': bool(devices),
+        'write_protection': 'ENABLED' if protected else ('DISABLED' if devices else 'READY'),
+        'read_access': 'ALLOWED' if devices else 'NOT CONNECTED',
+        'file_create': access,
+        'folder_create': access,
+        'file_modify': access,
+        'file_delete': access,
+        'forensic_integrity': integrity,
+        'evidence_admissible': 'ACTIVE' if protected else ('NO' if devices else 'READY'),
+        'last_update': data['last_update'],
+    }
+
+@app.route('/api/protection_status')
+def get_protection_status():
+    return json_response('protection_status', build_protection_status)
+
+@app.route('/api/device_states')
+def get_device_states():
+    """Protection pipeline state per device (detected → protecting → verifying → protected/failed)"""
+    return json_response('device_states', lambda data: list(data['device_states'].values()))
+
+@app.route('/api/catalog')
+def get_catalog():
+    """Evidence file catalog
+
+    Without device=<identity>, lists the indexed devices. With it, returns
+    files filtered by prefix, ext, name, min_size, max_size, known
+    (known-good, known-bad or unknown), file_type and mismatch=1 (content
+    type contradicts the extension), paged with limit/offset.
+    """
+    device = request.args.get('device')
+    if not device:
+        catalogs = []
+        if os.path.isdir(CATALOG_DIR):
+            for name in sorted(os.listdir(CATALOG_DIR)):
+                if name.endswith('.db'):
+                    catalog = Catalog(os.path.join(CATALOG_DIR, name), readonly=True)
+                    try:
+                        catalogs.append(catalog.summary())
+                    except sqlite3.Error:
+                        continue  # being created, or from an older version not yet reopened
+                    finally:
+                        catalog.close()
+        return jsonify({'catalogs': catalogs})
+    
+    path = catalog_path(device)
+    if not os.path.exists(path):
+        return jsonify({'status': 'error', 'message': f"No catalog for {device}"}), 404
+    try:
+        filters = {
+            'min_size': request.args.get('min_size', type=int),
+            'max_size': request.args.get('max_size', type=int),
+            'limit': min(request.args.get('limit', 100, type=int), 1000),
+            'offset': request.args.get('offset', 0, type=int),
+            'known': request.args.get('known'),
+            'file_type': request.args.get('file_type'),
+            'mismatch': request.args.get('mismatch', '').lower() in ('1', 'true', 'yes'),
+        }
+        catalog = Catalog(path, readonly=True)
+        try:
+            files = catalog.query(request.args.get('prefix'), request.args.get('ext'),
+                                  request.args.get('name'), **filters)
+            summary = catalog.summary()
+        finally:
+            catalog.close()
+    except sqlite3.Error as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    return jsonify({'device': device, 'summary': summary, 'files': files})
+
+@app.route('/api/search')
+def search():
+    """Keyword/regex search streamed as server-sent events
+
+    q=<keyword> and regex=<pattern> may repeat; case=1 makes matching case
+    sensitive. The target is device=<identity> (its indexed volume) or
+    image=<name> (an acquired image in the evidence directory). Each hit is
+    sent as a `hit` event as soon as its worker finishes; a final `done`
+    event carries the totals.
+    """
+    device = request.args.get('device')
+    image = request.args.get('image')
+    if image:
+        if os.path.basename(image) != image or not os.path.isfile(os.path.join(EVIDENCE_DIR, image)):
+            return jsonify({'status': 'error', 'message': f"No evidence image {image}"}), 404
+        target = os.path.join(EVIDENCE_DIR, image)
+    elif device:
+        path = catalog_path(device)
+        root = None
+        if os.path.exists(path):
+            catalog = Catalog(path, readonly=True)
+            try:
+                root = catalog.meta().get('root')
+            except sqlite3.Error:
+                pass
+            finally:
+                catalog.close()
+        if not root or not os.path.isdir(root):
+            return jsonify({'status': 'error', 'message': f"No indexed volume for {device}"}), 404
     else:
-        devices = [{
-            'drive': 'D:\\',
-            'status': 'READY',
-            'connected_at': datetime.now().strftime('%H:%M:%S'),
-            'protection': 'ACTIVE',
-            'files_accessible': '0 files (no device)'
-        }]
-    return jsonify(devices)
+        return jsonify({'status': 'error', 'message': "device= or image= is required"}), 400
+    try:
+        searcher = KeywordSearcher(
+            request.args.getlist('q'), request.args.getlist('regex'),
+            ignore_case=request.args.get('case', '').lower() not in ('1', 'true', 'yes'),
+            max_hits=min(request.args.get('max_hits', 1000, type=int), DEFAULT_MAX_HITS))
+    except (ValueError, re.error) as e:
+        return jsonify({'status': 'error', 'message': f"Bad search: {e}"}), 400
+    
+    def generate():
+        results = searcher.search_image(target, device) if image else searcher.search_volume(root, device)
+        try:
+            for hit in results:
+                yield f"event: hit\ndata: {json.dumps(hit)}\n\n"
+        finally:
+            results.close()  # client went away: stop the workers
+        stats = dict(searcher.stats, errors=searcher.stats['errors'][:100])
+        add_log(f"🔎 Keyword search on {device or image}: {stats['hits']} hits in "
+                f"{stats['bytes'] / 1024 / 1024:.1f} MB", device=device)
+        yield f"event: done\ndata: {json.dumps(stats)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 @app.route('/api/logs')
 def get_logs():
-    return jsonify({'logs': protection_status['logs'][-20:]})  # Last 20 logs
+    return jsonify({'logs': recent_logs(20)})  # Last 20 logs
 
 @app.route('/api/live_logs')
 def live_logs():
-    """Server-sent events for live logs"""
+    """Server-sent events for live logs (only new events, resumable via Last-Event-ID)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+    subscription = broadcaster.subscribe(last_event_id, replay=10)
+    
     def generate():
-        while True:
-            # Get latest logs
-            latest_logs = protection_status['logs'][-10:]  # Last 10 logs
-            data = json.dumps({'logs': latest_logs})
-            yield f"data: {data}\n\n"
-            time.sleep(2)  # Update every 2 seconds
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                frames = subscription.get(timeout=SSE_KEEPALIVE)
+                if not frames:
+                    yield ": keepalive\n\n"  # lets us notice clients that went away
+                for _, frame in frames:
+                    yield frame
+        finally:
+            subscription.close()
     
-    return Response(generate(), mimetype='text/event-stream')
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 @app.route('/api/export_logs')
 def export_logs():
-    """Export logs as text file"""
-    log_text = "FORENSIC SHIELD - ACTIVITY LOG\n"
-    log_text += "=" * 40 + "\n"
-    log_text += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    log_text += f"Threats Blocked: {protection_status['threats_blocked']}\n"
-    log_text += f"System Health: {protection_status['system_health']}%\n"
-    log_text += "=" * 40 + "\n\n"
+    """Stream logs as a download
+
+    Query parameters: format=text|jsonl|csv, gzip=1, start/end (epoch or ISO
+    time), level=INFO,WARNING and device=<identity>.
+    """
+    fmt = request.args.get('format', 'text')
+    if fmt not in FORMATS:
+        return jsonify({'status': 'error', 'message': f"Unknown format: {fmt}"}), 400
+    try:
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f"Bad time range: {e}"}), 400
+    levels = {level.strip().upper() for level in request.args.get('level', '').split(',') if level.strip()}
+    device = request.args.get('device')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    header = "FORENSIC SHIELD - ACTIVITY LOG\n"
+    header += "=" * 40 + "\n"
+    header += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    status = status_store.get().data
+    header += f"Threats Blocked: {status['threats_blocked']}\n"
+    header += f"System Health: {status['system_health']}%\n"
+    header += "=" * 40 + "\n\n"
     
-    for log in protection_status['logs']:
-        log_text += f"{log}\n"
+    # Jump straight to the start of the range instead of scanning from the first record
+    first_seq = log_store.find_seq(start) if start is not None else None
+    records = filter_records(log_store.iter_range(first_seq), start, end, levels, device)
+    body = encode(render(records, fmt, header), compress)
     
+    mimetype, extension = FORMATS[fmt]
+    filename = f"forensic_shield_logs.{extension}"
+    if compress:
+        mimetype, filename = 'application/gzip', filename + '.gz'
     return Response(
-        log_text,
-        mimetype='text/plain',
-        headers={'Content-Disposition': 'attachment;filename=forensic_shield_logs.txt'}
+        body,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment;filename={filename}'}
     )
 
 @app.route('/api/simulate_protection', methods=['POST'])
@@ -146,20 +397,17 @@ def simulate_protection():
     
     # Add logs with timestamps
     for log in protection_logs:
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        protection_status['logs'].append(f"[{timestamp}] {log}")
+        add_log(log)
     
     # Update device status
-    protection_status['devices'] = [{
+    status_store.update(devices=[{
         'drive': 'D:\\',
         'status': 'PROTECTED',
         'connected_at': datetime.now().strftime('%H:%M:%S'),
         'protection': 'FULLY PROTECTED',
         'files_accessible': '8 files',
         'write_protected': True
-    }]
-    
-    protection_status['last_update'] = datetime.now().isoformat()
+    }], last_update=datetime.now().isoformat())
     
     return jsonify({
         'status': 'success',
@@ -198,49 +446,61 @@ def simulate_attack():
     
     # Add logs with timestamps
     for log in attack_logs:
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        protection_status['logs'].append(f"[{timestamp}] {log}")
+        add_log(log)
     
     # Update system metrics to show active protection
-    protection_status['last_update'] = datetime.now().isoformat()
-    protection_status['threats_blocked'] = protection_status.get('threats_blocked', 0) + 1
+    def record_threat(data):
+        data['threats_blocked'] = data.get('threats_blocked', 0) + 1
+    snapshot = status_store.update(record_threat, last_update=datetime.now().isoformat())
     
     return jsonify({
         'status': 'success',
         'message': f'Protection test completed - {attack_type} prevented',
         'attack_type': attack_type,
         'response_time': f"{response_time}ms",
-        'threats_blocked': protection_status['threats_blocked'],
+        'threats_blocked': snapshot.data['threats_blocked'],
         'system_status': 'SECURE'
     })
 
 @app.route('/api/system_health')
 def system_health():
     """Get current system health"""
+    status = status_store.get().data
     return jsonify({
-        'system_health': protection_status['system_health'],
-        'threats_blocked': protection_status['threats_blocked'],
-        'active_devices': len(protection_status['devices']),
-        'total_logs': len(protection_status['logs']),
-        'uptime': '100%'
+        'system_health': status['system_health'],
+        'threats_blocked': status['threats_blocked'],
+        'active_devices': len(status['devices']),
+        'total_logs': log_store.count(),
+        'uptime': format_uptime(time.monotonic() - STARTED_MONOTONIC),
+        'uptime_seconds': round(time.monotonic() - STARTED_MONOTONIC, 1)
     })
 
 @app.route('/api/clear_logs', methods=['POST'])
 def clear_logs():
-    """Clear all logs"""
-    protection_status['logs'] = [
-        f"[{datetime.now().strftime('%H:%M:%S')}] SYSTEM: Logs cleared manually"
-    ]
+    """Clear the terminal display (the on-disk journal is kept)"""
+    log_store.clear_ring()
+    add_log("SYSTEM: Logs cleared manually")
     return jsonify({'status': 'success', 'message': 'Logs cleared'})
 
 def update_status(device_info=None, activity=None):
     """Update system status from detector"""
     if device_info:
-        protection_status['devices'] = [device_info]
+        status_store.update(devices=[dict(device_info)])
     if activity:
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        protection_status['logs'].append(f"[{timestamp}] {activity}")
-        protection_status['last_update'] = datetime.now().isoformat()
+        add_log(activity, device=device_info.get('identity') if device_info else None)
+        status_store.update(last_update=datetime.now().isoformat())
+
+def update_device_state(state):
+    """Record a protection pipeline state change from the detector"""
+    def record_state(data):
+        device_states = dict(data['device_states'])  # copy: older snapshots share the old dict
+        if state['state'] == REMOVED:
+            device_states.pop(state['identity'], None)
+        else:
+            device_states[state['identity']] = state
+        data['device_states'] = device_states
+        data['system_health'] = health_percent(device_states)
+    status_store.update(record_state, last_update=datetime.now().isoformat())
 
 def run_dashboard(host='127.0.0.1', port=5000):
     print(f"🌐 Forensic Shield Dashboard STARTING...")
@@ -258,6 +518,9 @@ class Dashboard:
     def update_status(self, device_info=None, activity=None):
         update_status(device_info, activity)
     
+    def update_device_state(self, state):
+        update_device_state(state)
+    
     def run(self, host='127.0.0.1', port=5000):
         run_dashboard(host, port)
 
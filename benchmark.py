@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Benchmarks
+"""
+import http.client
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from blockdev import FakeProtectionBackend
+from detector import ForensicShield
+from device_events import FakeDeviceSource
+from device_inventory import DeviceInventory
+from hasher import EvidenceHasher
+from indexer import Catalog, FileIndexer
+from protector import FAILED, PROTECTED, ProtectionPipeline
+from scheduler import BusScheduler, FakeTopology
+from verification import FakeStateProbe, ProtectionVerifier
+
+SUITES = ('storm', 'hash', 'index', 'dashboard', 'sse')
+DEFAULTS = {
+    'devices': 50,           # simultaneous insertions in the storm
+    'workers': 4,            # protection pipeline workers
+    'backend_delay': 0.002,  # seconds the fake backend takes to protect a device
+    'tree_mb': 64,           # large-file part of the generated evidence tree
+    'small_files': 2000,     # 4 KiB files in the tree
+    'concurrency': 16,       # dashboard client threads
+    'duration': 2.0,         # seconds of load per dashboard endpoint
+    'clients': 200,          # SSE viewers
+    'events': 50,            # log events published to them
+    'tolerance': 0.2,        # --compare: relative change that counts as a regression
+}
+# Compared by --compare; 'lower' means a smaller number is better
+HEADLINE = [
+    ('storm.protected_ms.p50', 'lower'),
+    ('storm.protected_ms.p99', 'lower'),
+    ('hash.mb_per_s', 'higher'),
+    ('index.files_per_s', 'higher'),
+    ('index.hashed_mb_per_s', 'higher'),
+    ('dashboard.total_rps', 'higher'),
+    ('sse.latency_ms.p99', 'lower'),
+    ('sse.delivered_ratio', 'higher'),
+]
+DASHBOARD_ENDPOINTS = ['/api/status', '/api/devices', '/api/device_states', '/api/system_health', '/metrics']
+SSE_MARKER = 'BENCH-SSE'
+SSE_PATTERN = re.compile(SSE_MARKER + r' (\d+) ([\d.]+)')
+MiB = 1024 * 1024
+
+
+def percentiles(values):
+    """count/mean/p50/p90/p99/max (nearest rank) of a list of numbers"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    def rank(p):
+        return ordered[max(0, min(len(ordered) - 1, -(-len(ordered) * p // 100) - 1))]
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': round(rank(50), 3),
+        'p90': round(rank(90), 3),
+        'p99': round(rank(99), 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def wait_for(predicate, timeout, interval=0.002):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+
+def bench_storm(devices, workers, backend_delay):
+    """N simultaneous insertions, then N simultaneous removals, through the real monitor loop"""
+    roots = []
+    for i in range(devices):
+        root = os.path.abspath(os.path.join('storm', f"usb{i:04d}"))
+        os.makedirs(root)
+        with open(os.path.join(root, 'evidence.txt'), 'w') as f:
+            f.write(f"device {i}\n")
+        roots.append(root)
+
+    source = FakeDeviceSource()
+    probe = FakeStateProbe()
+    inserted, finished = {}, {}
+
+    def on_state_change(state):
+        if state['state'] in (PROTECTED, FAILED):
+            finished.setdefault(state['drive'], (state['state'], time.monotonic()))
+
+    shield = ForensicShield(device_source=source, inventory=DeviceInventory(scanner=source.partitions),
+                            backend=FakeProtectionBackend(backend_delay, probe), verifier=ProtectionVerifier(probe),
+                            pipeline=ProtectionPipeline(workers=workers, on_state_change=on_state_change),
+                            hash_evidence=False, console=False, scheduler=BusScheduler(FakeTopology()))
+    monitor = threading.Thread(target=shield.start_monitoring, name='bench-monitor', daemon=True)
+    monitor.start()
+    try:
+        started = time.monotonic()
+        for root in roots:
+            inserted[root] = time.monotonic()
+            source.add(root)
+        complete = wait_for(lambda: len(finished) >= devices, timeout=60 + devices * backend_delay * 2)
+        insert_s = time.monotonic() - started
+        protected_ms = [(at - inserted[drive]) * 1000 for drive, (state, at) in finished.items()]
+        applied_ms = [info['protection_latency_ms'] for info in list(shield.connected_devices.values())]
+
+        started = time.monotonic()
+        for root in roots:
+            source.remove(root)
+        removed = wait_for(lambda: not shield.connected_devices, timeout=60)
+        removal_s = time.monotonic() - started
+    finally:
+        shield.stop_monitoring()
+        monitor.join(timeout=5)
+        shield.pipeline.stop()
+        shield.custody.close()
+    return {
+        'devices': devices,
+        'workers': workers,
+        'backend_delay_ms': backend_delay * 1000,
+        'complete': complete and removed,
+        'failed': sum(1 for state, _ in finished.values() if state == FAILED),
+        'protected_ms': percentiles(protected_ms),  # insertion -> verified protected
+        'applied_ms': percentiles(applied_ms),  # event -> protection applied (detector's own clock)
+        'insert_s': round(insert_s, 3),
+        'removal_s': round(removal_s, 3),
+    }
+
+
+def make_tree(root, total_mb, small_files):
+    """small_files 4 KiB files over 20 directories, plus 8 MiB files adding up to total_mb"""
+    block = os.urandom(MiB)
+    for i in range(small_files):
+        directory = os.path.join(root, f"dir{i % 20:02d}")
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"file{i:05d}.bin"), 'wb') as f:
+            f.write(block[i % 256 * 4096:][:4096])
+    large = os.path.join(root, 'large')
+    os.makedirs(large)
+    for i in range(max(1, total_mb // 8)):
+        with open(os.path.join(large, f"image{i:03d}.raw"), 'wb') as f:
+            for _ in range(8):
+                f.write(block)
+    return root
+
+
+def bench_hash(root):
+    """Single read pass over the tree (warm page cache: measures the hashing, not the disk)"""
+    hasher = EvidenceHasher()
+    report = hasher.hash_tree(root)
+    return {
+        'algorithms': list(hasher.algorithms),
+        'files': report['files'],
+        'bytes': report['bytes'],
+        'elapsed': round(report['elapsed'], 3),
+        'mb_per_s': round(report['mb_per_s'], 1),
+        'files_per_s': round(report['files'] / report['elapsed'], 1) if report['elapsed'] > 0 else 0,
+    }
+
+
+def bench_index(root):
+    """Full metadata index, incremental re-index, then an index that hashes as it goes"""
+    results = {}
+    catalog = Catalog(os.path.abspath('bench-catalog.db'))
+    try:
+        full = FileIndexer().index(root, catalog)
+        again = FileIndexer().index(root, catalog, incremental=True)
+    finally:
+        catalog.close()
+    catalog = Catalog(os.path.abspath('bench-catalog-hashed.db'))
+    try:
+        hashed = FileIndexer(hasher=EvidenceHasher()).index(root, catalog)
+    finally:
+        catalog.close()
+    results['files'] = full['files']
+    results['files_per_s'] = round(full['files_per_s'], 1)
+    results['incremental_files_per_s'] = round(again['files_per_s'], 1)
+    results['hashed_mb_per_s'] = round(hashed['bytes'] / MiB / hashed['elapsed'], 1) if hashed['elapsed'] > 0 else 0
+    return results
+
+
+def start_dashboard():
+    """The real Flask app on an ephemeral port (imported here: it opens its log journal in the cwd)"""
+    from werkzeug.serving import make_server
+    import app as dashboard
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no access log line per request
+    server = make_server('127.0.0.1', 0, dashboard.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-dashboard', daemon=True).start()
+    return dashboard, server
+
+
+def load(port, path, concurrency, duration, conditional=False):
+    """Hammer one endpoint from `concurrency` keep-alive connections for `duration` seconds"""
+    latencies, statuses, errors = [], {}, [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        headers = {}
+        mine, codes = [], {}
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                continue
+            mine.append((time.perf_counter() - started) * 1000)
+            codes[response.status] = codes.get(response.status, 0) + 1
+            if conditional and response.getheader('ETag'):
+                headers = {'If-None-Match': response.getheader('ETag')}
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            for code, count in codes.items():
+                statuses[code] = statuses.get(code, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': percentiles(latencies),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'errors': errors[0],
+        'elapsed': round(elapsed, 3),
+    }
+
+
+def bench_dashboard(dashboard, port, concurrency, duration, devices):
+    """Requests/s per polling endpoint, plus the ETag (304) path the dashboard page actually hits"""
+    for i in range(devices):
+        dashboard.update_device_state({'identity': f"bench-{i:04d}", 'drive': f"/media/bench{i}", 'state': PROTECTED,
+                                       'error': None, 'updated_at': time.time(), 'history': []})
+    endpoints = {}
+    for path in DASHBOARD_ENDPOINTS:
+        endpoints[path] = load(port, path, concurrency, duration)
+    for path in ('/api/status', '/api/device_states'):
+        endpoints[path + ' (etag)'] = load(port, path, concurrency, duration, conditional=True)
+    requests = sum(e['requests'] for e in endpoints.values())
+    elapsed = sum(e['elapsed'] for e in endpoints.values())
+    return {
+        'concurrency': concurrency,
+        'duration': duration,
+        'endpoints': endpoints,
+        'total_rps': round(requests / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+def bench_sse(dashboard, port, clients, events, interval=0.01):
+    """`clients` live-log viewers on real connections; delivery latency of each published event"""
+    latencies = [[] for _ in range(clients)]
+    finished_at = [None] * clients
+    baseline = dashboard.broadcaster.client_count()
+
+    def viewer(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            conn.request('GET', '/api/live_logs')
+            response = conn.getresponse()
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if not line.startswith(b'data: '):
+                    continue
+                match = SSE_PATTERN.search(json.loads(line[6:])['log'])
+                if match is None:
+                    continue  # replayed history, other log lines
+                latencies[index].append((time.perf_counter() - float(match.group(2))) * 1000)
+                if int(match.group(1)) == events - 1:  # the newest event is never the one dropped
+                    finished_at[index] = time.perf_counter()
+                    break
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        finally:
+            conn.close()
+
+    started = time.monotonic()
+    threads = []
+    for index in range(clients):
+        thread = threading.Thread(target=viewer, args=(index,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        if index % 50 == 49:  # stay inside the server's listen backlog
+            wait_for(lambda: dashboard.broadcaster.client_count() >= baseline + index + 1, timeout=10)
+    connected = wait_for(lambda: dashboard.broadcaster.client_count() >= baseline + clients, timeout=30)
+    connect_s = time.monotonic() - started
+
+    first_publish = time.perf_counter()
+    for i in range(events):
+        dashboard.add_log(f"{SSE_MARKER} {i} {time.perf_counter():.6f}")
+        time.sleep(interval)
+    last_publish = time.perf_counter()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    delivered = sum(len(l) for l in latencies)
+    done = [at for at in finished_at if at is not None]
+    return {
+        'clients': clients,
+        'events': events,
+        'connected': connected,
+        'connect_s': round(connect_s, 3),
+        'delivered': delivered,
+        'delivered_ratio': round(delivered / (clients * events), 4),
+        'clients_finished': len(done),
+        'latency_ms': percentiles([ms for client in latencies for ms in client]),
+        'publish_s': round(last_publish - first_publish, 3),
+        'fanout_tail_ms': round((max(done) - last_publish) * 1000, 3) if done else None,
+    }
+
+
+def run_benchmarks(options=None, suites=SUITES, progress=print):
+    """Run the selected suites in the current directory; returns the JSON-ready report"""
+    options = dict(DEFAULTS, **(options or {}))
+    results = {}
+    if 'storm' in suites:
+        progress(f"⚡ Device storm: {options['devices']} insertions/removals...")
+        results['storm'] = bench_storm(options['devices'], options['workers'], options['backend_delay'])
+    if 'hash' in suites or 'index' in suites:
+        progress(f"🌳 Generating {options['tree_mb']} MB + {options['small_files']} small files...")
+        tree = make_tree(os.path.abspath('tree'), options['tree_mb'], options['small_files'])
+        if 'hash' in suites:
+            progress("🔐 Hasher...")
+            results['hash'] = bench_hash(tree)
+        if 'index' in suites:
+            progress("🗂️ Indexer...")
+            results['index'] = bench_index(tree)
+    if 'dashboard' in suites or 'sse' in suites:
+        dashboard, server = start_dashboard()
+        try:
+            if 'dashboard' in suites:
+                progress(f"🌐 Dashboard: {options['concurrency']} clients x {len(DASHBOARD_ENDPOINTS) + 2} endpoints...")
+                results['dashboard'] = bench_dashboard(dashboard, server.server_port, options['concurrency'],
+                                                       options['duration'], options['devices'])
+            if 'sse' in suites:
+                progress(f"📡 SSE fan-out: {options['clients']} viewers, {options['events']} events...")
+                results['sse'] = bench_sse(dashboard, server.server_port, options['clients'], options['events'])
+        finally:
+            server.shutdown()
+    return {
+        'created_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'options': options,
+        'results': results,
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def lookup(results, path):
+    value = results
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(report, baseline, tolerance):
+    """Headline numbers against an earlier report; returns [(path, old, new, change, regressed)]"""
+    rows = []
+    for path, better in HEADLINE:
+        old, new = lookup(baseline['results'], path), lookup(report['results'], path)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            continue
+        change = (new - old) / abs(old)
+        regressed = change > tolerance if better == 'lower' else change < -tolerance
+        rows.append((path, old, new, change, regressed))
+    return rows
+
+
+def option(name, default):
+    prefix = f"--{name.replace('_', '-')}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return type(default)(arg[len(prefix):])
+    return default
+
+
+if __name__ == "__main__":
+    if '--help' in sys.argv:
+        print("Usage: benchmark.py [--only=storm,hash,index,dashboard,sse] [--output=benchmark.json] "
+              "[--compare=old.json] " + ' '.join(f"[--{k.replace('_', '-')}={v}]" for k, v in DEFAULTS.items()))
+        sys.exit(0)
+    options = {name: option(name, default) for name, default in DEFAULTS.items()}
+    suites = option('only', ','.join(SUITES)).split(',')
+    output = os.path.abspath(option('output', 'benchmark.json'))
+    baseline_path = option('compare', '')
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    # Logs, custody journal, catalogs and generated trees all go to a scratch directory
+    home = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='shield-bench-')
+    os.chdir(workdir)
+    try:
+        report = run_benchmarks(options, suites)
+    finally:
+        os.chdir(home)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    results = report['results']
+    if 'storm' in results:
+        storm = results['storm']
+        print(f"   ⚡ {storm['devices']} devices protected in {storm['insert_s']:.2f}s: p50 "
+              f"{storm['protected_ms'].get('p50')} ms, p99 {storm['protected_ms'].get('p99')} ms; "
+              f"removed in {storm['removal_s']:.2f}s")
+    if 'hash' in results:
+        print(f"   🔐 Hasher: {results['hash']['mb_per_s']} MB/s ({', '.join(results['hash']['algorithms'])})")
+    if 'index' in results:
+        index = results['index']
+        print(f"   🗂️ Indexer: {index['files_per_s']:,.0f} files/s, incremental {index['incremental_files_per_s']:,.0f} "
+              f"files/s, hashing {index['hashed_mb_per_s']} MB/s")
+    if 'dashboard' in results:
+        for path, stats in results['dashboard']['endpoints'].items():
+            print(f"   🌐 {path}: {stats['rps']:,.0f} req/s, p99 {stats['latency_ms'].get('p99')} ms")
+    if 'sse' in results:
+        sse = results['sse']
+        print(f"   📡 SSE: {sse['delivered']}/{sse['clients'] * sse['events']} delivered to {sse['clients']} "
+              f"viewers, p50 {sse['latency_ms'].get('p50')} ms, p99 {sse['latency_ms'].get('p99')} ms")
+    print(f"✅ Results written to {output}")
+
+    if baseline is not None:
+        rows = compare(report, baseline, options['tolerance'])
+        for path, old, new, change, regressed in rows:
+            print(f"   {'❌' if regressed else '✅'} {path}: {old} -> {new} ({change:+.1%})")
+        if any(row[4] for row in rows):
+            print(f"⚠️ Regressions beyond {options['tolerance']:.0%} against {baseline_path}")
+            sys.exit(1)
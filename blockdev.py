@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Native Linux Block Device Write Protection
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# From <linux/fs.h>: _IO(0x12, 93) / _IO(0x12, 94)
+BLKROSET = 0x125D
+BLKROGET = 0x125E
+
+# From <sys/mount.h>
+MS_RDONLY = 1
+MS_REMOUNT = 32
+
+_libc = None
+
+
+def libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        _libc.mount.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulong, ctypes.c_void_p]
+    return _libc
+
+
+def set_readonly(device, readonly=True):
+    """Set or clear the kernel read-only flag on a block device (BLKROSET)"""
+    fd = os.open(device, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+    try:
+        fcntl.ioctl(fd, BLKROSET, struct.pack('i', 1 if readonly else 0))
+    finally:
+        os.close(fd)
+
+
+def get_readonly(device):
+    """Read the kernel read-only flag back from a block device (BLKROGET)"""
+    fd = os.open(device, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+    try:
+        result = fcntl.ioctl(fd, BLKROGET, struct.pack('i', 0))
+    finally:
+        os.close(fd)
+    return struct.unpack('i', result)[0] != 0
+
+
+def parent_disk(device):
+    """/dev/sdb1 -> /dev/sdb (None if device is already a whole disk)"""
+    name = os.path.basename(os.path.realpath(device))
+    sys_path = os.path.join('/sys/class/block', name)
+    if not os.path.exists(os.path.join(sys_path, 'partition')):
+        return None
+    parent = os.path.basename(os.path.dirname(os.path.realpath(sys_path)))
+    return f"/dev/{parent}"
+
+
+def remount_readonly(mountpoint):
+    """Remount a filesystem read-only via mount(2), no /bin/mount process"""
+    ret = libc().mount(None, mountpoint.encode(), None, MS_REMOUNT | MS_RDONLY, None)
+    if ret != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), mountpoint)
+
+
+def is_mount_readonly(mountpoint):
+    return bool(os.statvfs(mountpoint).f_flag & os.ST_RDONLY)
+
+
+class LinuxBlockBackend:
+    """Write protection through ioctls and mount(2) directly from Python"""
+    name = 'blkroset'
+
+    def apply(self, device, mountpoint=None):
+        """Remount read-only, then lock the partition and its parent disk; returns per-step results"""
+        steps = {}
+
+        # Remount first so dirty data is flushed while the device still accepts writes
+        if mountpoint and mountpoint != device:
+            steps['remount'] = self.run_step(self.remount, mountpoint)
+        steps['blkroset'] = self.run_step(set_readonly, device)
+        parent = parent_disk(device)
+        if parent:
+            steps['blkroset_disk'] = self.run_step(set_readonly, parent)
+        return steps
+
+    def remount(self, mountpoint):
+        if not is_mount_readonly(mountpoint):
+            remount_readonly(mountpoint)
+
+    def run_step(self, func, target):
+        started = time.perf_counter()
+        try:
+            func(target)
+            ok, error = True, None
+        except OSError as e:
+            ok, error = False, str(e)
+        return {'ok': ok, 'target': target, 'error': error, 'ms': (time.perf_counter() - started) * 1000}
+
+    def is_readonly(self, device, mountpoint=None):
+        """(block flag set, mount read-only) read straight from the kernel"""
+        block = get_readonly(device)
+        mount = is_mount_readonly(mountpoint) if mountpoint and mountpoint != device else None
+        return block, mount
+
+
+class FakeProtectionBackend:
+    """Test backend: protection takes `delay` seconds and touches nothing
+
+    With a FakeStateProbe, protected devices then read back as read-only,
+    as they would through the real kernel state.
+    """
+    name = 'fake'
+
+    def __init__(self, delay=0.0, probe=None, fail=()):
+        self.delay = delay
+        self.probe = probe
+        self.fail = set(fail)
+        self.applied = []
+        self.lock = threading.Lock()
+
+    def apply(self, device, mountpoint=None):
+        started = time.perf_counter()
+        if self.delay:
+            time.sleep(self.delay)
+        ok = device not in self.fail
+        with self.lock:
+            self.applied.append(device)
+        if ok and self.probe is not None:
+            self.probe.set(device, True, True)
+        return {'blkroset': {'ok': ok, 'target': device, 'error': None if ok else 'Operation not permitted',
+                             'ms': (time.perf_counter() - started) * 1000}}
+
+    def is_readonly(self, device, mountpoint=None):
+        with self.lock:
+            protected = device in self.applied and device not in self.fail
+        return protected, protected
+
+
+def get_protection_backend():
+    """Native backend where available; None means the Windows command methods"""
+    if sys.platform.startswith('linux') and fcntl is not None:
+        return LinuxBlockBackend()
+    return None
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Live Event Broadcaster (Server-Sent Events)
+"""
+import itertools
+import json
+import threading
+from collections import deque
+
+DEFAULT_HISTORY = 1000
+DEFAULT_CLIENT_QUEUE = 256
+
+
+class Subscription:
+    """One SSE client: a bounded queue of pre-serialized frames"""
+    def __init__(self, broadcaster, maxlen):
+        self.broadcaster = broadcaster
+        self.frames = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, event_id, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1  # slow viewer: oldest frame goes, memory stays bounded
+        self.frames.append((event_id, frame))
+
+    def get(self, timeout=None):
+        """Wait for new frames; returns a (possibly empty) list"""
+        with self.broadcaster.cond:
+            if not self.frames and not self.closed:
+                self.broadcaster.cond.wait(timeout)
+            frames = list(self.frames)
+            self.frames.clear()
+        return frames
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class LogBroadcaster:
+    """Single publish/subscribe hub: each event is serialized once and fanned out to every client"""
+    def __init__(self, history=DEFAULT_HISTORY, client_queue=DEFAULT_CLIENT_QUEUE, backfill=None):
+        self.cond = threading.Condition()
+        # backfill(after_id, before_id, limit) -> newest `limit` (event_id, data) pairs in that gap,
+        # for clients resuming from further back than the in-memory history
+        self.backfill = backfill
+        self.ids = itertools.count(1)
+        self.last_id = 0
+        self.history = deque(maxlen=history)
+        self.client_queue = client_queue
+        self.subscribers = set()
+
+    @staticmethod
+    def frame(event_id, data, event=None):
+        lines = [f"id: {event_id}"]
+        if event:
+            lines.append(f"event: {event}")
+        lines.append(f"data: {json.dumps(data)}")
+        return "\n".join(lines) + "\n\n"
+
+    def publish(self, data, event=None, event_id=None):
+        """Publish one event to every subscriber; returns its id
+
+        Callers that already number their events (e.g. the log store) pass
+        event_id so SSE ids and log sequence numbers are the same thing.
+        """
+        with self.cond:
+            if event_id is None:
+                event_id = next(self.ids)
+            elif event_id <= self.last_id:
+                raise ValueError(f"Event ids must increase ({event_id} <= {self.last_id})")
+            frame = self.frame(event_id, data, event)
+            self.history.append((event_id, frame))
+            self.last_id = event_id
+            for subscription in self.subscribers:
+                subscription.push(event_id, frame)
+            self.cond.notify_all()
+        return event_id
+
+    def subscribe(self, last_event_id=None, replay=0):
+        """New client; resumes after last_event_id, or replays the last `replay` events"""
+        subscription = Subscription(self, self.client_queue)
+        with self.cond:
+            if last_event_id is not None:
+                backlog = [item for item in self.history if item[0] > last_event_id]
+                oldest = self.history[0][0] if self.history else self.last_id + 1
+                if self.backfill and last_event_id + 1 < oldest:
+                    older = self.backfill(last_event_id, oldest, self.client_queue)
+                    backlog = [(event_id, self.frame(event_id, data)) for event_id, data in older] + backlog
+            else:
+                backlog = list(self.history)[-replay:] if replay else []
+            for event_id, frame in backlog[-self.client_queue:]:
+                subscription.push(event_id, frame)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.cond:
+            subscription.closed = True
+            self.subscribers.discard(subscription)
+            self.cond.notify_all()
+
+    def client_count(self):
+        return len(self.subscribers)
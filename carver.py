@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - File Carving
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # candidates are then found with mmap.find, one pattern at a time
+    np = None
+
+# Each window costs a few temporary arrays of its size in every worker
+WINDOW_SIZE = 16 * 1024 * 1024
+# Work unit per process; headers are owned by the region they start in
+REGION_SIZE = 16 * WINDOW_SIZE
+COPY_SIZE = 1024 * 1024
+DEFAULT_ALGORITHMS = ('md5', 'sha256')
+
+
+def jpeg_length(mm, offset, max_size):
+    """Walk the marker segments to the scan, then take the first EOI after it
+
+    Skipping whole segments steps over the EXIF thumbnail (which has its own
+    EOI), and anything that isn't a marker chain is rejected outright.
+    """
+    position = offset + 2
+    limit = min(len(mm), offset + max_size)
+    while position + 4 <= limit:
+        if mm[position] != 0xFF:
+            return None
+        marker = mm[position + 1]
+        if marker == 0xFF:  # fill byte
+            position += 1
+        elif marker == 0xD9:
+            return position + 2 - offset
+        elif 0xD0 <= marker <= 0xD7 or marker == 0x01:  # markers without a length
+            position += 2
+        else:
+            segment = struct.unpack_from('>H', mm, position + 2)[0]
+            if segment < 2:
+                return None
+            if marker == 0xDA:  # start of scan: entropy-coded data never contains an unstuffed EOI
+                end = mm.find(b'\xff\xd9', position + 2 + segment, limit)
+                return end + 2 - offset if end >= 0 else None
+            position += 2 + segment
+    return None
+
+
+def bmp_length(mm, offset, max_size):
+    """Declared file size, trusted only behind a known DIB header size"""
+    if offset + 18 > len(mm) or struct.unpack_from('<I', mm, offset + 14)[0] not in (40, 108, 124):
+        return None
+    return struct.unpack_from('<I', mm, offset + 2)[0]
+
+
+def riff_length(mm, offset, max_size):
+    return struct.unpack_from('<I', mm, offset + 4)[0] + 8 if offset + 8 <= len(mm) else None
+
+
+def sqlite_length(mm, offset, max_size):
+    if offset + 32 > len(mm):
+        return None
+    page_size = struct.unpack_from('>H', mm, offset + 16)[0]
+    page_size = 65536 if page_size == 1 else page_size
+    if page_size < 512 or page_size & (page_size - 1):
+        return None
+    return page_size * struct.unpack_from('>I', mm, offset + 28)[0]
+
+
+# header parts as in signatures.SIGNATURES (the first at offset 0); a file ends at its
+# first footer (plus footer_extra trailing bytes) or at the size its header declares
+MiB = 1024 * 1024
+CarveFormat = namedtuple('CarveFormat', 'type header extension footer footer_extra min_size max_size length',
+                         defaults=(None, 0, 64, 20 * MiB, None))
+CARVE_FORMATS = [
+    CarveFormat('jpeg', [(0, b'\xff\xd8\xff')], '.jpg', length=jpeg_length, min_size=128),
+    CarveFormat('png', [(0, b'\x89PNG\r\n\x1a\n')], '.png', b'IEND\xaeB`\x82'),
+    CarveFormat('gif', [(0, b'GIF87a')], '.gif', b'\x00;'),
+    CarveFormat('gif', [(0, b'GIF89a')], '.gif', b'\x00;'),
+    CarveFormat('pdf', [(0, b'%PDF-')], '.pdf', b'%%EOF', max_size=100 * MiB),
+    # End of central directory record: 4-byte signature + 18 bytes (comment not included)
+    CarveFormat('zip', [(0, b'PK\x03\x04')], '.zip', b'PK\x05\x06', footer_extra=18, max_size=100 * MiB),
+    CarveFormat('bmp', [(0, b'BM')], '.bmp', length=bmp_length),
+    CarveFormat('wav', [(0, b'RIFF'), (8, b'WAVE')], '.wav', length=riff_length, max_size=500 * MiB),
+    CarveFormat('avi', [(0, b'RIFF'), (8, b'AVI ')], '.avi', length=riff_length, max_size=2048 * MiB),
+    CarveFormat('webp', [(0, b'RIFF'), (8, b'WEBP')], '.webp', length=riff_length),
+    CarveFormat('sqlite', [(0, b'SQLite format 3\x00')], '.sqlite', length=sqlite_length, max_size=1024 * MiB),
+]
+
+
+def header_matches(mm, offset, parts):
+    return all(mm[offset + o:offset + o + len(m)] == m for o, m in parts[1:])
+
+
+def find_vectorized(arr, magic, limit, prefix_cache):
+    """Positions p < limit where arr[p:] starts with magic
+
+    One full-window pass per distinct two-byte prefix (shared by every
+    pattern starting with it); the remaining bytes only filter the
+    surviving candidates. Two bytes rather than one keeps the candidate
+    list small on erased (0xFF-filled) flash.
+    """
+    prefix = magic[:2]
+    positions = prefix_cache.get(prefix)
+    if positions is None:
+        if len(prefix) == 2:
+            positions = np.flatnonzero((arr[:-1] == prefix[0]) & (arr[1:] == prefix[1]))
+        else:
+            positions = np.flatnonzero(arr == prefix[0])
+        prefix_cache[prefix] = positions
+    positions = positions[positions < min(limit, len(arr) - len(magic) + 1)]
+    for i in range(len(prefix), len(magic)):
+        positions = positions[arr[positions + i] == magic[i]]
+    return positions
+
+
+def scan_window_numpy(mm, start, end, formats):
+    """(format index, offset, footer positions) for headers starting in [start, end)"""
+    longest = max(o + len(m) for f in formats for o, m in f.header)
+    longest_footer = max((len(f.footer) for f in formats if f.footer), default=0)
+    stop = min(len(mm), end + max(longest, longest_footer) - 1)  # overlap into the next window
+    arr = np.frombuffer(mm, dtype=np.uint8, count=stop - start, offset=start)
+    try:
+        prefix_cache = {}
+        footers = {}
+        found = []
+        for index, fmt in enumerate(formats):
+            positions = find_vectorized(arr, fmt.header[0][1], end - start, prefix_cache)
+            for o, m in fmt.header[1:]:
+                positions = positions[positions + o + len(m) <= len(arr)]
+                for i, byte in enumerate(m):
+                    positions = positions[arr[positions + o + i] == byte]
+            if not len(positions):
+                continue
+            if fmt.footer and fmt.footer not in footers:
+                footers[fmt.footer] = find_vectorized(arr, fmt.footer, len(arr), prefix_cache) + start
+            found.append((index, positions + start, footers.get(fmt.footer)))
+        return found
+    finally:
+        del arr  # the mapping can't be closed while a view is exported
+
+
+def carve_extent(mm, fmt, offset, footer_positions=None):
+    """Length of the file starting at offset, or None if it can't be bounded"""
+    header_end = offset + max(o + len(m) for o, m in fmt.header)
+    if fmt.length:
+        length = fmt.length(mm, offset, fmt.max_size)
+    else:
+        end = -1
+        if footer_positions is not None:
+            index = np.searchsorted(footer_positions, header_end)
+            if index < len(footer_positions):
+                end = int(footer_positions[index])
+        if end < 0:  # no footer in this window: look further on in the image
+            end = mm.find(fmt.footer, header_end, min(len(mm), offset + fmt.max_size))
+        if end < 0:
+            return None
+        length = end + len(fmt.footer) + fmt.footer_extra - offset
+    if length is None or not fmt.min_size <= length <= fmt.max_size or offset + length > len(mm):
+        return None
+    return length
+
+
+def scan_window(mm, start, end, formats):
+    """(format index, offset, length) for every carvable file whose header starts in [start, end)"""
+    results = []
+    if np is not None:
+        for index, positions, footer_positions in scan_window_numpy(mm, start, end, formats):
+            fmt = formats[index]
+            for offset in positions.tolist():
+                length = carve_extent(mm, fmt, offset, footer_positions)
+                if length:
+                    results.append((index, offset, length))
+    else:
+        for index, fmt in enumerate(formats):
+            magic = fmt.header[0][1]
+            offset = mm.find(magic, start, min(len(mm), end + len(magic) - 1))
+            while offset >= 0:
+                if header_matches(mm, offset, fmt.header):
+                    length = carve_extent(mm, fmt, offset)
+                    if length:
+                        results.append((index, offset, length))
+                offset = mm.find(magic, offset + 1, min(len(mm), end + len(magic) - 1))
+    results.sort(key=lambda r: r[1])
+    return results
+
+
+def carve_region(image, start, length, output_dir, algorithms, formats=CARVE_FORMATS, window_size=WINDOW_SIZE):
+    """Worker-process side: find, write out and hash every file whose header is in the region"""
+    carved = []
+    covered = {}  # type -> end of the last file carved as that type
+    with open(image, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for window in range(start, start + length, window_size):
+                for index, offset, size in scan_window(mm, window, min(window + window_size, start + length), formats):
+                    fmt = formats[index]
+                    if offset + size <= covered.get(fmt.type, 0):
+                        continue  # e.g. a zip's later local headers, inside the zip already carved
+                    covered[fmt.type] = offset + size
+                    name = f"{offset:012d}-{fmt.type}{fmt.extension}"
+                    digests = [hashlib.new(a) for a in algorithms]
+                    with open(os.path.join(output_dir, name), 'wb') as out, memoryview(mm) as view:
+                        for piece in range(offset, offset + size, COPY_SIZE):
+                            data = view[piece:min(piece + COPY_SIZE, offset + size)]
+                            out.write(data)
+                            for d in digests:
+                                d.update(data)
+                            data.release()
+                    carved.append({
+                        'type': fmt.type,
+                        'offset': offset,
+                        'length': size,
+                        'path': name,
+                        'hashes': {a: d.hexdigest() for a, d in zip(algorithms, digests)},
+                    })
+    return carved
+
+
+class FileCarver:
+    """Carves files out of a raw image by header/footer signatures across a process pool
+
+    The image is memory-mapped in every worker, so regions cost no copying
+    and a file whose footer lies beyond its region is still carved whole.
+    """
+    def __init__(self, processes=None, formats=None, algorithms=DEFAULT_ALGORITHMS, region_size=REGION_SIZE):
+        self.processes = processes or os.cpu_count() or 1
+        self.formats = formats or CARVE_FORMATS
+        self.algorithms = tuple(algorithms)
+        self.region_size = region_size
+
+    def carve(self, image, output_dir, progress=None):
+        """Carve image into output_dir; writes carved.json there and returns the report"""
+        if image.endswith('.fsi'):
+            raise ValueError("Carving needs a raw image (extract the segmented image first)")
+        started = time.perf_counter()
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        size = os.path.getsize(image)
+        carved = []
+        covered = {}  # type -> end of the last file kept, across all regions
+        window_size = min(WINDOW_SIZE, self.region_size)
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            futures = [pool.submit(carve_region, image, start, min(self.region_size, size - start), output_dir,
+                                   self.algorithms, self.formats, window_size)
+                       for start in range(0, size, self.region_size)]
+            for done, future in enumerate(futures, 1):
+                for item in future.result():
+                    # Regions only know their own files: drop one inside a file an earlier region carved whole
+                    if item['offset'] + item['length'] <= covered.get(item['type'], 0):
+                        try:
+                            os.remove(os.path.join(output_dir, item['path']))
+                        except OSError:
+                            pass
+                        continue
+                    covered[item['type']] = item['offset'] + item['length']
+                    carved.append(item)
+                if progress:
+                    progress(min(done * self.region_size, size), size, len(carved))
+        elapsed = time.perf_counter() - started
+        counts = {}
+        for item in carved:
+            counts[item['type']] = counts.get(item['type'], 0) + 1
+        report = {
+            'image': image,
+            'output': output_dir,
+            'size': size,
+            'files': carved,
+            'counts': counts,
+            'elapsed': elapsed,
+            'mb_per_s': size / (1024 * 1024) / elapsed if elapsed > 0 else 0,
+        }
+        with open(os.path.join(output_dir, 'carved.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: carver.py <image.dd> <output-dir>")
+        sys.exit(1)
+    image, output_dir = sys.argv[1], sys.argv[2]
+    print(f"🪓 Carving {image} -> {output_dir}...")
+    report = FileCarver().carve(image, output_dir, progress=lambda done, total, files: print(
+        f"\r   {done / 1024 / 1024:.0f}/{total / 1024 / 1024:.0f} MB, {files} files", end=''))
+    print()
+    for kind, count in sorted(report['counts'].items()):
+        print(f"   {kind}: {count}")
+    print(f"✅ {len(report['files'])} files carved in {report['elapsed']:.2f}s ({report['mb_per_s']:.1f} MB/s)")
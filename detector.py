@@ -3,116 +3,245 @@
 Forensic Shield - Real Write Protection
 """
 import time
+import errno
 import logging
 from datetime import datetime
-import psutil
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from acquisition import EVIDENCE_DIR, ImageAcquirer, format_progress, raw_device_path
+from blockdev import get_protection_backend
+from custody import CustodyJournal
+from shield_logging import setup_logging
+from device_events import get_device_source
+from device_inventory import DeviceInventory, DeviceRecord
+from hasher import EvidenceHasher, iter_files
+from hashset import KNOWN_BAD, HashSet, tag_catalog
+from indexer import Catalog, FileIndexer, catalog_path
+from metrics import (BYTES_READ, DETECTION_LATENCY, DEVICES, FAILURES, PROTECTION_LATENCY, PROTECTION_METHOD_DURATION,
+                     QUEUE_DEPTH, SUBPROCESS_TIMEOUTS, THROUGHPUT, VERIFICATION_DURATION)
+from manifest import build_manifest, load_manifest, manifest_path, safe_name, save_manifest, verify_manifest
+from signatures import SignatureClassifier, classify_catalog
+from verification import ProtectionVerifier
+from protector import (ProtectionPipeline, DETECTED, PROTECTING, VERIFYING, PROTECTED, FAILED, REMOVED,
+                       PRIORITY_BACKGROUND, PRIORITY_VERIFY)
+from scheduler import BusScheduler, InventoryTopology
 
 class ForensicShield:
-    def __init__(self):
+    def __init__(self, device_source=None, inventory=None, hasher=None, hash_evidence=True, pipeline=None,
+                 backend=None, verifier=None, custody=None, console=True, indexer=None, acquire_dir=None,
+                 acquirer=None, hash_sets=(), classifier=None, carver=None, scheduler=None):
         self.connected_devices = {}
-        self.setup_logger()
-        self.known_drives = set(self.get_drives())
-        print("🛡️ Forensic Shield Initialized (Write Protection Mode)")
+        self.custody = custody or CustodyJournal()
+        # Native in-process backend where the platform has one, else the Windows command methods
+        self.backend = backend if backend is not None else get_protection_backend()
+        self.verifier = verifier or ProtectionVerifier()
+        self.pipeline = pipeline or ProtectionPipeline()
+        self.step_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='protect-step')
+        self.hasher = hasher or EvidenceHasher(chunk_digests=True)
+        self.hash_evidence = hash_evidence
+        self.hash_reports = {}
+        self.index_reports = {}
+        self.indexer = indexer or FileIndexer()
+        # Set to a directory to image every protected device there automatically
+        self.acquire_dir = acquire_dir
+        self.acquirer = acquirer or ImageAcquirer()
+        # Set to a FileCarver to carve every completed raw image
+        self.carver = carver
+        # Known-file reference sets (paths or HashSet objects) used to tag catalogued files
+        self.hash_sets = [HashSet(h) if isinstance(h, str) else h for h in hash_sets]
+        self.classifier = classifier or SignatureClassifier()
+        self.setup_logger(console)
+        self.inventory = inventory or DeviceInventory()
+        self.inventory.refresh()  # drives present at startup are not treated as new
+        # Bulk reads (hashing, imaging, re-verification) share each controller/hub fairly
+        self.scheduler = scheduler or BusScheduler(InventoryTopology(self.inventory))
+        # Queue depths are only read when /metrics is scraped
+        QUEUE_DEPTH.labels('protection').set_function(self.pipeline.pending)
+        QUEUE_DEPTH.labels('custody').set_function(lambda: len(self.custody.pending))
+        QUEUE_DEPTH.labels('bus_readers').set_function(lambda: len(self.scheduler.waiting))
+        self.device_source = device_source or get_device_source()
+        self.running = False
+        self.say("🛡️ Forensic Shield Initialized (Write Protection Mode)")
+        if self.custody.recovered:
+            self.say(f"⚠️ Custody journal: cut a torn final record ({len(self.custody.recovered)} bytes, "
+                     f"kept in {self.custody.path}.torn)", logging.WARNING, step='custody')
         
-    def setup_logger(self):
-        """Setup logging for Windows"""
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('logs/forensic_shield.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+    def setup_logger(self, console=True):
+        """Setup queue-based logging (JSON lines file, optional console)"""
+        self.logger = setup_logging(console=console)
+    
+    def say(self, message, level=logging.INFO, **fields):
+        """Operator-facing output; only enqueues, the listener thread does the I/O"""
+        fields['display'] = True
+        self.logger.log(level, message, extra=fields)
         
     def get_drives(self):
         """Get all connected drives"""
-        return [partition.device for partition in psutil.disk_partitions()]
+        return [record.device for record in self.inventory.records()]
     
     def is_usb_drive(self, drive):
-        """Check if drive is likely a USB drive"""
-        try:
-            for partition in psutil.disk_partitions():
-                if partition.device == drive:
-                    # USB drives often have 'removable' flag or are not C: drive
-                    if 'removable' in partition.opts or (drive != 'C:' and len(drive) == 2):
-                        return True
-            return False
-        except:
+        """Check if drive is likely a USB drive (uses the current snapshot, no rescan)"""
+        record = drive if isinstance(drive, DeviceRecord) else self.inventory.get(drive)
+        if record is None:
             return False
+        # USB drives often have 'removable' flag or are not C: drive
+        return record.removable or (record.device != 'C:' and len(record.device) == 2)
     
     def apply_write_protection(self, drive):
         """Apply real write protection to the drive"""
         try:
-            drive_letter = drive[0]  # Get 'D' from 'D:'
+            self.say(f"🛡️ Applying WRITE PROTECTION to {drive}...", device=drive, step='protect')
             
-            print(f"🛡️ Applying WRITE PROTECTION to {drive}...")
+            if self.backend is not None:
+                return self.apply_backend_protection(drive)
             
-            # Method 1: Use Windows Registry to enable write protection
-            try:
-                print("   Enabling system-wide write protection...")
-                reg_command = f'reg add "HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\StorageDevicePolicies" /v WriteProtect /t REG_DWORD /d 1 /f'
-                result = subprocess.run(reg_command, shell=True, capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    print("   ✅ System write protection enabled")
-            except Exception as e:
-                print(f"   ⚠️ Registry method: {e}")
-            
-            # Method 2: Use diskpart to set disk as read-only
-            try:
-                print("   Setting disk as read-only...")
-                diskpart_commands = f"""select volume {drive_letter}
-attributes disk set readonly
-exit
-"""
-                result = subprocess.run(
-                    'diskpart',
-                    input=diskpart_commands,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                if "readonly" in result.stdout.lower():
-                    print("   ✅ Disk set as read-only")
-            except Exception as e:
-                print(f"   ⚠️ Diskpart method: {e}")
-            
-            # Method 3: Remove write permissions using icacls
-            try:
-                print("   Removing write permissions...")
-                # First ensure read access
-                subprocess.run(f'icacls {drive} /grant Everyone:(RX)', shell=True, capture_output=True, timeout=5)
-                # Then deny write access
-                result = subprocess.run(f'icacls {drive} /deny Everyone:(W)', shell=True, capture_output=True, timeout=5)
-                if result.returncode == 0:
-                    print("   ✅ Write permissions removed")
-            except Exception as e:
-                print(f"   ⚠️ Permission method: {e}")
+            # The three methods don't depend on each other, so run them side by side
+            futures = {
+                'registry': self.step_pool.submit(self.protect_registry),
+                'diskpart': self.step_pool.submit(self.protect_diskpart, drive),
+                'icacls': self.step_pool.submit(self.protect_permissions, drive),
+            }
+            for method, future in futures.items():
+                if not future.result():
+                    FAILURES.labels(method).inc()
             
             return True
             
         except Exception as e:
-            print(f"❌ Error applying protection: {str(e)}")
+            self.say(f"❌ Error applying protection: {str(e)}", logging.ERROR, device=drive, step='protect')
             return False
     
-    def test_write_protection(self, drive):
-        """Test if write protection is actually working"""
-        print(f"🧪 Testing write protection on {drive}...")
+    def apply_backend_protection(self, drive):
+        """Protect through the native backend (no processes spawned)"""
+        record = self.inventory.get(drive)
+        mountpoint = record.mountpoint if record else None
+        steps = self.backend.apply(drive, mountpoint)
+        for name, step in steps.items():
+            PROTECTION_METHOD_DURATION.labels(name).observe(step['ms'] / 1000)
+            if step['ok']:
+                self.say(f"   ✅ {name} {step['target']} ({step['ms']:.2f} ms)",
+                         device=drive, step=name, duration_ms=round(step['ms'], 3))
+            else:
+                FAILURES.labels(name).inc()
+                self.say(f"   ⚠️ {name} {step['target']}: {step['error']}", logging.WARNING,
+                         device=drive, step=name, duration_ms=round(step['ms'], 3))
+        return steps['blkroset']['ok']
+    
+    def run_command(self, args, **kwargs):
+        """subprocess.run that counts timeouts (still raised to the caller)"""
+        try:
+            return subprocess.run(args, **kwargs)
+        except subprocess.TimeoutExpired:
+            SUBPROCESS_TIMEOUTS.labels(args[0]).inc()
+            raise
+    
+    def protect_registry(self):
+        """Method 1: Use Windows Registry to enable write protection"""
+        started = time.perf_counter()
+        try:
+            self.say("   Enabling system-wide write protection...", step='registry')
+            result = self.run_command(
+                ['reg', 'add', 'HKEY_LOCAL_MACHINE\\SYSTEM\\CurrentControlSet\\Control\\StorageDevicePolicies',
+                 '/v', 'WriteProtect', '/t', 'REG_DWORD', '/d', '1', '/f'],
+                capture_output=True, text=True, timeout=10
+            )
+            if result.returncode == 0:
+                self.say("   ✅ System write protection enabled", step='registry',
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+                return True
+        except Exception as e:
+            self.say(f"   ⚠️ Registry method: {e}", logging.WARNING, step='registry')
+        finally:
+            PROTECTION_METHOD_DURATION.labels('registry').observe(time.perf_counter() - started)
+        return False
+    
+    def protect_diskpart(self, drive):
+        """Method 2: Use diskpart to set disk as read-only"""
+        started = time.perf_counter()
+        try:
+            self.say("   Setting disk as read-only...", device=drive, step='diskpart')
+            drive_letter = drive[0]  # Get 'D' from 'D:'
+            diskpart_commands = f"""select volume {drive_letter}
+attributes disk set readonly
+exit
+"""
+            result = self.run_command(
+                ['diskpart'],
+                input=diskpart_commands,
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            if "readonly" in result.stdout.lower():
+                self.say("   ✅ Disk set as read-only", device=drive, step='diskpart',
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+                return True
+        except Exception as e:
+            self.say(f"   ⚠️ Diskpart method: {e}", logging.WARNING, device=drive, step='diskpart')
+        finally:
+            PROTECTION_METHOD_DURATION.labels('diskpart').observe(time.perf_counter() - started)
+        return False
+    
+    def protect_permissions(self, drive):
+        """Method 3: Remove write permissions using icacls"""
+        started = time.perf_counter()
+        try:
+            self.say("   Removing write permissions...", device=drive, step='icacls')
+            # First ensure read access, then deny write access (order matters here)
+            self.run_command(['icacls', drive, '/grant', 'Everyone:(RX)'], capture_output=True, timeout=5)
+            result = self.run_command(['icacls', drive, '/deny', 'Everyone:(W)'], capture_output=True, timeout=5)
+            if result.returncode == 0:
+                self.say("   ✅ Write permissions removed", device=drive, step='icacls',
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+                return True
+        except Exception as e:
+            self.say(f"   ⚠️ Permission method: {e}", logging.WARNING, device=drive, step='icacls')
+        finally:
+            PROTECTION_METHOD_DURATION.labels('icacls').observe(time.perf_counter() - started)
+        return False
+    
+    def test_write_protection(self, drive, destructive=False, refresh=True):
+        """Check write protection from OS read-only state (no writes to evidence)"""
+        if destructive:
+            return self.probe_write_protection(drive)
+        
+        self.say(f"🧪 Checking write protection on {drive}...", device=drive, step='verify')
+        record = self.inventory.get(drive) or DeviceRecord(drive, drive)
+        with VERIFICATION_DURATION.labels('protection').time():
+            result = self.verifier.check(record, refresh=refresh)
+        
+        if not result['read_access']:
+            self.say("   ❌ Read access failed")
+            return False, False
+        if result['files'] is not None:
+            self.say(f"   ✅ Read access: Can view {result['files']} files")
+        if result['block_readonly'] is not None:
+            self.say(f"   {'✅' if result['block_readonly'] else '❌'} Block device read-only flag: "
+                  f"{'SET' if result['block_readonly'] else 'NOT SET'}")
+        if result['mount_readonly'] is not None:
+            self.say(f"   {'✅' if result['mount_readonly'] else '❌'} Volume read-only: "
+                  f"{'YES' if result['mount_readonly'] else 'NO'}")
+        if result['block_readonly'] is None and result['mount_readonly'] is None:
+            self.say(f"   ⚠️ {self.verifier.probe.name} probe cannot report read-only state for {drive}")
+        return True, result['write_protected']
+    
+    def protection_status(self, drive):
+        """Cached protection state for the dashboard and re-checks"""
+        record = self.inventory.get(drive) or DeviceRecord(drive, drive)
+        return self.verifier.check(record)
+    
+    def probe_write_protection(self, drive):
+        """Legacy probe: actually try to write to the drive (touches evidence)"""
+        self.say(f"🧪 Testing write protection on {drive} (write probe)...")
         
         # Test 1: Can we read files?
         try:
             files = os.listdir(drive)
-            print(f"   ✅ Read access: Can view {len(files)} files")
+            self.say(f"   ✅ Read access: Can view {len(files)} files")
             read_works = True
         except Exception as e:
-            print(f"   ❌ Read access failed: {e}")
+            self.say(f"   ❌ Read access failed: {e}")
             return False, False
         
         # Test 2: Can we create new files? (should fail)
@@ -122,7 +251,7 @@ exit
         try:
             with open(test_file, 'w') as f:
                 f.write("test write operation")
-            print("   ❌ WRITE TEST FAILED: Can create new files")
+            self.say("   ❌ WRITE TEST FAILED: Can create new files")
             # Clean up the test file
             try:
                 os.remove(test_file)
@@ -130,10 +259,16 @@ exit
                 pass
             write_blocked = False
         except PermissionError:
-            print("   ✅ WRITE TEST PASSED: Cannot create new files")
+            self.say("   ✅ WRITE TEST PASSED: Cannot create new files")
             write_blocked = True
+        except OSError as e:
+            write_blocked = e.errno == errno.EROFS  # read-only filesystem counts as blocked
+            if write_blocked:
+                self.say("   ✅ WRITE TEST PASSED: Cannot create new files (read-only filesystem)")
+            else:
+                self.say(f"   ⚠️ Write test error: {e}")
         except Exception as e:
-            print(f"   ⚠️ Write test error: {e}")
+            self.say(f"   ⚠️ Write test error: {e}")
             write_blocked = False
         
         # Test 3: Can we create new folders? (should fail)
@@ -142,7 +277,7 @@ exit
         
         try:
             os.mkdir(test_folder)
-            print("   ❌ FOLDER TEST FAILED: Can create new folders")
+            self.say("   ❌ FOLDER TEST FAILED: Can create new folders")
             # Clean up
             try:
                 os.rmdir(test_folder)
@@ -150,114 +285,436 @@ exit
                 pass
             folder_blocked = False
         except PermissionError:
-            print("   ✅ FOLDER TEST PASSED: Cannot create new folders")
+            self.say("   ✅ FOLDER TEST PASSED: Cannot create new folders")
             folder_blocked = True
+        except OSError as e:
+            folder_blocked = e.errno == errno.EROFS
+            if folder_blocked:
+                self.say("   ✅ FOLDER TEST PASSED: Cannot create new folders (read-only filesystem)")
+            else:
+                self.say(f"   ⚠️ Folder test error: {e}")
         except Exception as e:
-            print(f"   ⚠️ Folder test error: {e}")
+            self.say(f"   ⚠️ Folder test error: {e}")
             folder_blocked = False
         
         return read_works, (write_blocked and folder_blocked)
 
     def show_protection_status(self, drive, read_works, write_protected):
         """Show protection status"""
-        print(f"\n📊 WRITE PROTECTION STATUS for {drive}:")
-        print(f"   • Drive: {drive}")
+        lines = [f"\n📊 WRITE PROTECTION STATUS for {drive}:", f"   • Drive: {drive}"]
         
         if read_works and write_protected:
-            print(f"   • Protection: ✅ FULLY PROTECTED")
-            print(f"   • Read files: ✅ ALLOWED")
-            print(f"   • Create files: ❌ BLOCKED")
-            print(f"   • Create folders: ❌ BLOCKED")
-            print(f"   • Modify files: ❌ BLOCKED")
-            print(f"   • Delete files: ❌ BLOCKED")
-            print(f"   • Forensic Integrity: 🔒 PERFECT")
+            lines += [
+                "   • Protection: ✅ FULLY PROTECTED",
+                "   • Read files: ✅ ALLOWED",
+                "   • Create files: ❌ BLOCKED",
+                "   • Create folders: ❌ BLOCKED",
+                "   • Modify files: ❌ BLOCKED",
+                "   • Delete files: ❌ BLOCKED",
+                "   • Forensic Integrity: 🔒 PERFECT",
+            ]
         elif read_works and not write_protected:
-            print(f"   • Protection: 🟡 PARTIAL")
-            print(f"   • Read files: ✅ ALLOWED")
-            print(f"   • Write files: ✅ ALLOWED (PROBLEM)")
-            print(f"   • Forensic Integrity: ⚠️ AT RISK")
+            lines += [
+                "   • Protection: 🟡 PARTIAL",
+                "   • Read files: ✅ ALLOWED",
+                "   • Write files: ✅ ALLOWED (PROBLEM)",
+                "   • Forensic Integrity: ⚠️ AT RISK",
+            ]
         else:
-            print(f"   • Protection: ❌ FAILED")
-            print(f"   • Read files: ❌ BLOCKED")
-            print(f"   • Status: Evidence inaccessible")
+            lines += [
+                "   • Protection: ❌ FAILED",
+                "   • Read files: ❌ BLOCKED",
+                "   • Status: Evidence inaccessible",
+            ]
         
-        print(f"   • Evidence admissible: {'✅ YES' if write_protected else '❌ NO'}")
-        print(" " + "="*50)
+        lines.append(f"   • Evidence admissible: {'✅ YES' if write_protected else '❌ NO'}")
+        lines.append(" " + "="*50)
+        # One record instead of a dozen console writes
+        self.say("\n".join(lines), device=drive, step='status')
     
     def start_monitoring(self):
         """Start monitoring for USB devices"""
-        print("🛡️ Forensic Shield ACTIVE - Write Protection Enabled")
-        print("Press Ctrl+C to stop monitoring")
-        self.logger.info("Forensic Shield write protection started")
+        self.say("🛡️ Forensic Shield ACTIVE - Write Protection Enabled")
+        self.say(f"📡 Device events: {self.device_source.name}")
+        self.say("Press Ctrl+C to stop monitoring")
+        self.logger.info(f"Forensic Shield write protection started ({self.device_source.name} events)")
+        self.running = True
         
         try:
-            while True:
-                current_drives = set(self.get_drives())
-                new_drives = current_drives - self.known_drives
-                removed_drives = self.known_drives - current_drives
+            while self.running:
+                # Rescan only when the event source reports something
+                events = self.device_source.wait(timeout=1.0)
+                if not events:
+                    continue
+                detected_at = min(event.timestamp for event in events)
                 
-                # Handle new drives
-                for drive in new_drives:
-                    if self.is_usb_drive(drive):
-                        self.protect_device(drive)
+                # One partition scan per cycle, however many drives are attached
+                diff = self.inventory.refresh()
                 
-                # Handle removed drives
-                for drive in removed_drives:
-                    if drive in self.connected_devices:
-                        self.device_removed(drive)
+                # Cached protection state is stale for anything that just changed
+                for record in diff.added + diff.removed + [new for _, new in diff.changed]:
+                    self.verifier.invalidate(record.identity)
+                
+                # Handle new drives (queued, so one slow device never delays the next)
+                for record in diff.added:
+                    if self.is_usb_drive(record):
+                        self.pipeline.transition(record.identity, DETECTED, drive=record.device)
+                        self.pipeline.submit(record.identity, self.protect_device, (record.device, detected_at, record))
                 
-                self.known_drives = current_drives
-                time.sleep(3)
+                # Handle remounts / option changes of known drives
+                for old, new in diff.changed:
+                    if new.identity in self.connected_devices:
+                        self.device_changed(old, new)
+                
+                # Handle removed drives
+                for record in diff.removed:
+                    if record.identity in self.connected_devices or self.pipeline.state_of(record.identity):
+                        self.device_removed(record)
                 
         except KeyboardInterrupt:
-            print("\n🛑 Forensic Shield stopped")
+            self.say("\n🛑 Forensic Shield stopped")
             self.logger.info("Forensic Shield stopped by user")
+        finally:
+            self.running = False
     
-    def protect_device(self, drive):
+    def stop_monitoring(self):
+        """Ask the monitoring loop to exit"""
+        self.running = False
+        self.device_source.close()
+    
+    def protect_device(self, drive, detected_at=None, record=None):
         """Protect a newly connected USB drive"""
+        if detected_at is None:
+            detected_at = time.monotonic()
+        DETECTION_LATENCY.observe(time.monotonic() - detected_at)
+        DEVICES.labels('detected').inc()
+        record = record or self.inventory.get(drive) or DeviceRecord(drive, drive)
+        mountpoint = record.mountpoint
         device_info = {
             'drive': drive,
+            'mountpoint': mountpoint,
+            'identity': record.identity,
+            'serial': record.serial,
             'connected_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
         
-        print(f"\n🎯 NEW USB DETECTED: {drive}")
+        self.say(f"\n🎯 NEW USB DETECTED: {drive}", device=record.identity, step='detect')
         self.logger.info(f"USB Device detected: {drive}")
+        # Queued without waiting for fsync so the record never delays protection
+        self.custody.append('detected', record.identity, wait=False, drive=drive, mountpoint=mountpoint,
+                            serial=record.serial, source=self.device_source.name)
         
         # Apply write protection
+        if self.pipeline.transition(record.identity, PROTECTING, drive=drive) is None:
+            return device_info  # removed before its job got going
         protection_applied = self.apply_write_protection(drive)
+        latency_ms = (time.monotonic() - detected_at) * 1000
+        PROTECTION_LATENCY.observe(latency_ms / 1000)
+        self.say(f"⏱️ Time to protection for {drive}: {latency_ms:.1f} ms",
+                 device=record.identity, step='protect', duration_ms=round(latency_ms, 3))
+        self.logger.info(f"Protection latency: {drive} - {latency_ms:.1f} ms")
+        self.custody.append('protection', record.identity, wait=False, applied=protection_applied,
+                            method=self.backend.name if self.backend else 'windows', latency_ms=round(latency_ms, 1))
         
         # Test if protection is working
-        read_works, write_protected = self.test_write_protection(drive)
+        if self.pipeline.transition(record.identity, VERIFYING) is None:
+            self.say(f"📤 {drive} removed during protection", device=record.identity, step='remove')
+            return device_info
+        read_works, write_protected = self.test_write_protection(mountpoint)
         
         # Update device info
         device_info['read_access'] = read_works
         device_info['write_protected'] = write_protected
         device_info['protection_applied'] = protection_applied
+        device_info['protection_latency_ms'] = round(latency_ms, 1)
+        device_info['detection_source'] = self.device_source.name
+        
+        self.custody.append('verification', record.identity, read_access=read_works, write_protected=write_protected)
         
         # Show status
         self.show_protection_status(drive, read_works, write_protected)
         
         if read_works and write_protected:
-            print(f"🎉 SUCCESS: {drive} is WRITE-PROTECTED!")
-            print(f"💡 Try to copy/paste files to {drive} - it should FAIL!")
+            snapshot = self.pipeline.transition(record.identity, PROTECTED)
+            if snapshot is None:
+                self.say(f"📤 {drive} removed during verification", device=record.identity, step='remove')
+                return device_info
+            self.say(f"🎉 SUCCESS: {drive} is WRITE-PROTECTED!", device=record.identity, step='result')
+            self.say(f"💡 Try to copy/paste files to {drive} - it should FAIL!")
             self.logger.info(f"Drive write-protected: {drive}")
+            DEVICES.labels('protected').inc()
+            device_info['state'] = snapshot['state']
+            if self.hash_evidence:
+                # Long-running, so it goes behind any pending protection work
+                self.pipeline.submit(record.identity, self.hash_or_verify, (record, device_info),
+                                     priority=PRIORITY_BACKGROUND, name='hash')
+            if self.acquire_dir:
+                self.pipeline.submit(record.identity, self.acquire_device, (drive, self.acquire_dir, record),
+                                     priority=PRIORITY_BACKGROUND, name='acquire')
         elif read_works:
-            print(f"⚠️ PARTIAL: Can read {drive} but writes still allowed")
+            self.say(f"⚠️ PARTIAL: Can read {drive} but writes still allowed", logging.WARNING,
+                     device=record.identity, step='result')
             self.logger.warning(f"Write protection incomplete: {drive}")
+            DEVICES.labels('partial').inc()
+            snapshot = self.pipeline.transition(record.identity, FAILED, error="Write protection incomplete")
+            device_info['state'] = snapshot['state'] if snapshot else REMOVED
         else:
-            print(f"❌ FAILED: Cannot access {drive}")
+            self.say(f"❌ FAILED: Cannot access {drive}", logging.ERROR, device=record.identity, step='result')
             self.logger.error(f"Drive access failed: {drive}")
+            DEVICES.labels('failed').inc()
+            snapshot = self.pipeline.transition(record.identity, FAILED, error="Drive access failed")
+            device_info['state'] = snapshot['state'] if snapshot else REMOVED
+        
+        # Under the pipeline lock so a removal can't slip in between the check and the write
+        with self.pipeline.lock:
+            if self.pipeline.tracked(record.identity):
+                self.connected_devices[record.identity] = device_info
+        return device_info
+    
+    def acquire_device(self, drive, destination_dir=EVIDENCE_DIR, record=None):
+        """Make a bit-for-bit raw image of a write-protected device plus a hash sidecar"""
+        record = record or self.inventory.get(drive) or DeviceRecord(drive, drive)
+        if not os.path.exists(destination_dir):
+            os.makedirs(destination_dir)
+        source = raw_device_path(record)
+        image = os.path.join(destination_dir, f"{safe_name(record.identity)}-{datetime.now():%Y%m%d-%H%M%S}{self.acquirer.extension}")
+        self.say(f"💽 Imaging {source} -> {image}...", device=record.identity, step='acquire')
         
-        self.connected_devices[drive] = device_info
+        last = [0]
+        def progress(stats):
+            now = time.monotonic()
+            if now - last[0] >= 5:  # the acquirer reports twice a second; keep the console readable
+                last[0] = now
+                self.say(f"   {format_progress(stats)}", device=record.identity, step='acquire')
+        
+        with self.scheduler.session(record.identity, PRIORITY_VERIFY, 'acquire') as session:
+            report = self.acquirer.acquire(source, image, progress=progress, throttle=session.throttle)
+        THROUGHPUT.labels('acquire').observe(report['mb_per_s'])
+        BYTES_READ.labels('acquire').inc(report['bytes'])
+        for offset in report['bad_sectors'][:20]:
+            self.say(f"   ⚠️ Unreadable sector at offset {offset['offset']} (zero-filled)", logging.WARNING,
+                     device=record.identity, step='acquire')
+        if report['complete']:
+            self.say(f"   ✅ Image complete: {report['bytes']} bytes in {report['elapsed']:.2f}s "
+                     f"({report['mb_per_s']:.1f} MB/s), sha256 {report['hashes'].get('sha256')}",
+                     device=record.identity, step='acquire', duration_ms=round(report['elapsed'] * 1000, 1))
+        else:
+            self.say(f"   ❌ Image incomplete: {report['bytes']}/{report['size']} bytes {report['errors']}",
+                     logging.ERROR, device=record.identity, step='acquire')
+        self.custody.append('acquisition', record.identity, source=source, image=image, size=report['size'],
+                            bytes=report['bytes'], complete=report['complete'], hashes=report['hashes'],
+                            bad_sectors=len(report['bad_sectors']))
+        if self.carver and report['complete'] and report['format'] == 'raw':
+            report['carving'] = self.carve_image(record, image)
+        return report
+    
+    def carve_image(self, record, image, output_dir=None):
+        """Carve files out of a raw image; every carved file gets a custody record"""
+        output_dir = output_dir or image + '.carved'
+        self.say(f"🪓 Carving {image} -> {output_dir}...", device=record.identity, step='carve')
+        report = self.carver.carve(image, output_dir)
+        for item in report['files']:
+            self.custody.append('carved', record.identity, wait=False, image=image, type=item['type'],
+                                offset=item['offset'], length=item['length'],
+                                path=os.path.join(output_dir, item['path']), hashes=item['hashes'])
+        self.custody.flush()  # one group commit for the whole batch
+        counts = ', '.join(f"{count} {kind}" for kind, count in sorted(report['counts'].items())) or 'nothing'
+        self.say(f"   ✅ Carved {len(report['files'])} files ({counts}) in {report['elapsed']:.2f}s "
+                 f"({report['mb_per_s']:.1f} MB/s)", device=record.identity, step='carve',
+                 duration_ms=round(report['elapsed'] * 1000, 1))
+        return {'files': len(report['files']), 'counts': report['counts'], 'output': output_dir}
+    
+    def hash_or_verify(self, record, device_info):
+        """Index the device, then hash it if first seen or re-verify it against its manifest"""
+        device_info['catalog'] = self.index_device(record)
+        device_info['signatures'] = self.classify_device(record)
+        if os.path.exists(manifest_path(record.identity)):
+            device_info['verification'] = self.verify_device(record)
+            device_info['rehashed'] = self.rehash_catalog(record)
+        else:
+            device_info['hashes'] = self.hash_device(record)
+            catalog = Catalog(catalog_path(record.identity))
+            try:
+                catalog.update_hashes(self.hash_reports[record.identity]['results'], record.mountpoint)
+            finally:
+                catalog.close()
+        if self.hash_sets:
+            device_info['known'] = self.tag_known_files(record)
+    
+    def rehash_catalog(self, record):
+        """Hash the catalog rows the last index wrote without hashes (added/modified files,
+        or every file if the catalog was rebuilt) so hash-set tagging keeps covering them"""
+        report = self.index_reports[record.identity]
+        if self.indexer.hasher is not None:
+            return 0  # the indexer hashed them while scanning
+        if report['incremental']:
+            paths = [os.path.join(record.mountpoint, rel) for rel in report['added'] + report['modified']]
+            if not paths:
+                return 0
+        else:
+            paths = iter_files(record.mountpoint)
+        with self.scheduler.session(record.identity, PRIORITY_BACKGROUND, 'rehash') as session:
+            hashed = self.hasher.hash_paths(paths, throttle=session.throttle)
+        catalog = Catalog(catalog_path(record.identity))
+        try:
+            catalog.update_hashes(hashed['results'], record.mountpoint)
+        finally:
+            catalog.close()
+        self.say(f"   🔐 {hashed['files']} changed files re-hashed for the catalog", device=record.identity,
+                 step='index', duration_ms=round(hashed['elapsed'] * 1000, 1))
+        return hashed['files']
+    
+    def classify_device(self, record):
+        """Identify true file types from content and flag extensions that disagree"""
+        catalog = Catalog(catalog_path(record.identity))
+        try:
+            report = classify_catalog(catalog, record.mountpoint, self.classifier)
+            flagged = catalog.query(mismatch=True, limit=20) if report['mismatches'] else []
+        finally:
+            catalog.close()
+        self.say(f"   🔎 {report['classified']} files classified by signature, {report['mismatches']} extension mismatches",
+                 device=record.identity, step='signatures', duration_ms=round(report['elapsed'] * 1000, 1))
+        for row in flagged:
+            self.say(f"   ⚠️ TYPE MISMATCH: {row['path']} is {row['file_type']}", logging.WARNING,
+                     device=record.identity, step='signatures')
+        return {key: report[key] for key in ('classified', 'mismatches', 'elapsed')}
+    
+    def tag_known_files(self, record):
+        """Mark catalogued files found in the known-good/known-bad hash sets"""
+        catalog = Catalog(catalog_path(record.identity))
+        try:
+            started = time.perf_counter()
+            counts = tag_catalog(catalog, self.hash_sets)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            bad = catalog.query(known=KNOWN_BAD, limit=20) if counts.get(KNOWN_BAD) else []
+        finally:
+            catalog.close()
+        summary = ', '.join(f"{count} {label}" for label, count in sorted(counts.items())) or "no matches"
+        self.say(f"   📚 Hash sets: {summary}", device=record.identity, step='hashset', duration_ms=round(elapsed_ms, 1))
+        for row in bad:
+            self.say(f"   🚨 KNOWN-BAD FILE: {row['path']}", logging.WARNING, device=record.identity, step='hashset')
+        if counts.get(KNOWN_BAD):
+            self.custody.append('known_bad', record.identity, count=counts[KNOWN_BAD], sample=[row['path'] for row in bad])
+        return counts
+    
+    def index_device(self, record):
+        """Catalog every file on a protected device (metadata only, hashes are filled in later)"""
+        self.say(f"🗂️ Indexing {record.mountpoint}...", device=record.identity, step='index')
+        catalog = Catalog(catalog_path(record.identity))
+        try:
+            # Re-inserted devices only pay for the metadata walk; unchanged files keep their rows
+            report = self.indexer.index(record.mountpoint, catalog, incremental=True)
+            self.index_reports[record.identity] = report
+            catalog.set_meta(identity=record.identity, drive=record.device)
+        finally:
+            catalog.close()
+        self.say(f"   ✅ {report['files']} files catalogued in {report['elapsed']:.2f}s "
+                 f"({report['files_per_s']:,.0f} files/s)",
+                 device=record.identity, step='index', duration_ms=round(report['elapsed'] * 1000, 1))
+        if report['errors']:
+            self.say(f"   ⚠️ {len(report['errors'])} entries could not be read", logging.WARNING,
+                     device=record.identity, step='index')
+        summary = {key: report[key] for key in ('files', 'bytes', 'elapsed', 'incremental')}
+        if report['incremental']:
+            for change in ('added', 'removed', 'modified'):
+                summary[change] = len(report[change])
+                for rel in report[change][:20]:
+                    self.say(f"   {'⚠️' if change == 'added' else '❌'} {change.upper()} since last index: {rel}",
+                             logging.WARNING, device=record.identity, step='index')
+            self.custody.append('reindex', record.identity, files=report['files'], added=report['added'],
+                                removed=report['removed'], modified=report['modified'])
+        return summary
+    
+    def hash_device(self, record):
+        """Hash all evidence on a protected device in a single read pass"""
+        self.say(f"🔐 Hashing evidence on {record.mountpoint} ({', '.join(self.hasher.algorithms)})...")
+        with self.scheduler.session(record.identity, PRIORITY_VERIFY, 'hash') as session:
+            report = self.hasher.hash_tree(record.mountpoint, throttle=session.throttle)
+        self.hash_reports[record.identity] = report
+        THROUGHPUT.labels('hash').observe(report['mb_per_s'])
+        BYTES_READ.labels('hash').inc(report['bytes'])
+        manifest = build_manifest(record.mountpoint, report, record.identity, self.hasher.chunk_size)
+        save_manifest(manifest, manifest_path(record.identity))
+        mb = report['bytes'] / (1024 * 1024)
+        self.say(f"   ✅ {report['files']} files, {mb:.1f} MB in {report['elapsed']:.2f}s ({report['mb_per_s']:.1f} MB/s)",
+                 device=record.identity, step='hash', duration_ms=round(report['elapsed'] * 1000, 1))
+        if report['errors']:
+            self.say(f"   ⚠️ {report['errors']} files could not be read")
+        self.logger.info(
+            f"Evidence hashed: {record.identity} - {report['files']} files, "
+            f"{mb:.1f} MB at {report['mb_per_s']:.1f} MB/s, {report['errors']} errors"
+        )
+        self.say(f"   📜 Manifest saved, volume root: {manifest['volume_root']}")
+        self.custody.append('hashes', record.identity, files=report['files'], bytes=report['bytes'],
+                            errors=report['errors'], algorithms=list(self.hasher.algorithms),
+                            volume_root=manifest['volume_root'], manifest=manifest_path(record.identity))
+        summary = {key: report[key] for key in ('files', 'bytes', 'errors', 'elapsed', 'mb_per_s')}
+        summary['volume_root'] = manifest['volume_root']
+        return summary
+    
+    def verify_device(self, record, deep=False):
+        """Re-verify a re-inserted device against its stored manifest"""
+        self.say(f"🔍 Re-verifying {record.mountpoint} against stored manifest...")
+        # Background work: a first-time hash or an acquisition on the same bus preempts it
+        with self.scheduler.session(record.identity, PRIORITY_BACKGROUND, 'reverify') as session:
+            result = verify_manifest(record.mountpoint, load_manifest(manifest_path(record.identity)), deep=deep,
+                                     throttle=session.throttle)
+        VERIFICATION_DURATION.labels('manifest').observe(result['elapsed'])
+        if session.bytes and result['elapsed'] > 0:  # only changed files are re-read
+            THROUGHPUT.labels('reverify').observe(session.bytes / (1024 * 1024) / result['elapsed'])
+            BYTES_READ.labels('reverify').inc(session.bytes)
+        self.say(f"   Checked {result['files_checked']} files in {result['elapsed']:.2f}s "
+                 f"({result['files_reread']} re-read, {result['chunks_reread']} chunks)",
+                 device=record.identity, step='reverify', duration_ms=round(result['elapsed'] * 1000, 1))
+        for rel, change in result['modified'].items():
+            self.say(f"   ❌ MODIFIED: {rel} {change.get('ranges', change.get('error'))}", logging.WARNING,
+                     device=record.identity, step='reverify')
+        for rel in result['missing']:
+            self.say(f"   ❌ MISSING: {rel}")
+        for rel in result['added']:
+            self.say(f"   ⚠️ ADDED: {rel}")
+        self.custody.append('reverification', record.identity, ok=result['ok'], deep=deep,
+                            volume_root=result['volume_root'], modified=sorted(result['modified']),
+                            missing=result['missing'], added=result['added'])
+        if result['ok']:
+            self.say(f"   ✅ Evidence unchanged (volume root {result['volume_root']})")
+            self.logger.info(f"Manifest verified: {record.identity} - intact")
+        else:
+            self.logger.warning(
+                f"Manifest mismatch: {record.identity} - {len(result['modified'])} modified, "
+                f"{len(result['missing'])} missing, {len(result['added'])} added"
+            )
+        summary = {key: result[key] for key in ('ok', 'files_checked', 'files_reread', 'elapsed', 'missing', 'added')}
+        summary['modified'] = {rel: change.get('ranges') for rel, change in result['modified'].items()}
+        return summary
+    
+    def device_changed(self, old, new):
+        """Handle a known device being remounted or changing mount options"""
+        info = self.connected_devices[new.identity]
+        info['drive'] = new.device
+        info['mountpoint'] = new.mountpoint
+        self.say(f"🔄 Device changed: {old.mountpoint} -> {new.mountpoint} ({new.opts})", device=new.identity, step='change')
+        self.logger.info(f"Device changed: {new.identity} - {old.mountpoint} -> {new.mountpoint} ({new.opts})")
     
     def device_removed(self, drive):
         """Handle device removal"""
-        if drive in self.connected_devices:
-            info = self.connected_devices[drive]
+        identity = drive.identity if isinstance(drive, DeviceRecord) else drive
+        if identity not in self.connected_devices:
+            # Fall back to a lookup by drive string
+            for key, info in self.connected_devices.items():
+                if info['drive'] == identity:
+                    identity = key
+                    break
+        self.pipeline.discard(identity)
+        if identity in self.connected_devices:
+            info = self.connected_devices[identity]
+            drive = info['drive']
             status = "PROTECTED" if info.get('write_protected') else "UNPROTECTED"
-            print(f"📤 Device removed: {drive} - {status}")
-            self.logger.info(f"Device removed: {drive} - {status}")
-            del self.connected_devices[drive]
+            self.say(f"📤 Device removed: {drive} - {status}", device=identity, step='remove')
+            self.logger.info(f"Device removed: {drive} ({identity}) - {status}")
+            self.custody.append('removed', identity, wait=False, drive=drive, status=status)
+            DEVICES.labels('removed').inc()
+            del self.connected_devices[identity]
 
 if __name__ == "__main__":
     shield = ForensicShield()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Device Event Sources
+"""
+import logging
+import os
+import select
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+
+NETLINK_KOBJECT_UEVENT = 15
+MOUNTS_PATH = '/proc/self/mounts'
+
+FakePartition = namedtuple('FakePartition', 'device mountpoint fstype opts')
+
+
+class DeviceEvent:
+    """A single device arrival/removal/change notification"""
+    def __init__(self, action, device=None, source='poll', timestamp=None):
+        self.action = action
+        self.device = device
+        self.source = source
+        # Monotonic clock so insertion-to-protection latency is immune to wall clock jumps
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+
+    def __repr__(self):
+        return f"DeviceEvent({self.action!r}, {self.device!r}, source={self.source!r})"
+
+
+class PollingDeviceSource:
+    """Fallback source: asks for a rescan every `interval` seconds"""
+    name = 'poll'
+
+    def __init__(self, interval=3):
+        self.interval = interval
+        self.closed = threading.Event()
+        self.next_tick = time.monotonic()
+
+    def wait(self, timeout=None):
+        """Block until the next poll tick (or timeout) and return pending events"""
+        delay = max(0.0, self.next_tick - time.monotonic())
+        if timeout is not None and timeout < delay:
+            self.closed.wait(timeout)
+            return []
+        if self.closed.wait(delay):
+            return []
+        self.next_tick = time.monotonic() + self.interval
+        return [DeviceEvent('change', source=self.name)]
+
+    def close(self):
+        self.closed.set()
+
+
+class NetlinkDeviceSource:
+    """Linux source: kernel uevents for block devices plus mount table changes"""
+    name = 'netlink'
+
+    def __init__(self, mounts_path=MOUNTS_PATH):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        try:
+            self.sock.bind((0, 1))  # multicast group 1 = kernel uevents
+            self.sock.setblocking(False)
+            self.poller = select.poll()
+            self.poller.register(self.sock.fileno(), select.POLLIN)
+            # The kernel flags /proc/self/mounts with POLLPRI whenever the mount table
+            # changes, which is when a freshly inserted stick actually becomes usable.
+            self.mounts = open(mounts_path, 'rb')
+            self.poller.register(self.mounts.fileno(), select.POLLPRI | select.POLLERR)
+        except Exception:
+            self.sock.close()
+            raise
+
+    def parse_uevent(self, data):
+        """Turn a raw uevent datagram into a DeviceEvent (or None if not a block device)"""
+        fields = {}
+        for part in data.split(b'\0')[1:]:
+            key, sep, value = part.partition(b'=')
+            if sep:
+                fields[key.decode(errors='replace')] = value.decode(errors='replace')
+        if fields.get('SUBSYSTEM') != 'block':
+            return None
+        devname = fields.get('DEVNAME')
+        device = f"/dev/{devname}" if devname and not devname.startswith('/') else devname
+        return DeviceEvent(fields.get('ACTION', 'change'), device, source=self.name)
+
+    def drain_socket(self, events):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            event = self.parse_uevent(data)
+            if event:
+                events.append(event)
+
+    def wait(self, timeout=None):
+        """Block until the kernel reports a device or mount change"""
+        ready = self.poller.poll(None if timeout is None else int(timeout * 1000))
+        events = []
+        for fd, _ in ready:
+            if fd == self.sock.fileno():
+                self.drain_socket(events)
+            elif fd == self.mounts.fileno():
+                # Re-reading from the start re-arms the POLLPRI notification
+                self.mounts.seek(0)
+                self.mounts.read()
+                events.append(DeviceEvent('mount', source=self.name))
+        return events
+
+    def close(self):
+        try:
+            self.poller.unregister(self.sock.fileno())
+            self.poller.unregister(self.mounts.fileno())
+        except (KeyError, ValueError):
+            pass
+        self.sock.close()
+        self.mounts.close()
+
+
+class FakeDeviceSource:
+    """Scriptable source for tests: inject events and drive lists by hand"""
+    name = 'fake'
+
+    def __init__(self, drives=None):
+        self.drives = list(drives or [])
+        self.pending = []
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def get_drives(self):
+        with self.cond:
+            return list(self.drives)
+
+    def partitions(self):
+        """psutil.disk_partitions() stand-in for DeviceInventory(scanner=...)"""
+        return [FakePartition(drive, drive, 'fake', 'rw,removable') for drive in self.get_drives()]
+
+    def inject(self, event):
+        with self.cond:
+            self.pending.append(event)
+            self.cond.notify_all()
+
+    def add(self, device):
+        """Simulate insertion of `device`"""
+        with self.cond:
+            if device not in self.drives:
+                self.drives.append(device)
+        self.inject(DeviceEvent('add', device, source=self.name))
+
+    def remove(self, device):
+        """Simulate removal of `device`"""
+        with self.cond:
+            if device in self.drives:
+                self.drives.remove(device)
+        self.inject(DeviceEvent('remove', device, source=self.name))
+
+    def wait(self, timeout=None):
+        with self.cond:
+            if not self.pending and not self.closed:
+                self.cond.wait(timeout)
+            events, self.pending = self.pending, []
+            return events
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+def get_device_source(interval=3):
+    """Pick the best available event source for this platform"""
+    if sys.platform.startswith('linux') and os.path.exists(MOUNTS_PATH):
+        try:
+            return NetlinkDeviceSource()
+        except (OSError, AttributeError) as e:
+            logging.getLogger('forensic_shield').warning(
+                f"⚠️ Netlink device events unavailable ({e}), falling back to polling",
+                extra={'display': True, 'step': 'events'})
+    return PollingDeviceSource(interval)
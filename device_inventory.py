@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Device Inventory
+"""
+import os
+import re
+import sys
+import psutil
+
+BY_ID_DIR = '/dev/disk/by-id'
+SYS_BLOCK_DIR = '/sys/class/block'
+PCI_ADDRESS = re.compile(r'^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-9a-f]$')
+USB_ROOT_HUB = re.compile(r'^usb\d+$')
+USB_PORT = re.compile(r'^\d+-\d+(\.\d+)*$')
+
+
+def bus_path(sys_path):
+    """Shared links above a block device from its resolved sysfs path
+
+    /sys/devices/pci0000:00/0000:00:14.0/usb2/2-1/2-1.4/2-1.4:1.0/host6/...
+    gives ('pci-0000:00:14.0', 'usb2', 'hub-2-1'): the controller, its root
+    hub and every hub port between them and the device's own port.
+    """
+    parts = sys_path.split('/')
+    controllers = [p for p in parts if PCI_ADDRESS.match(p)]
+    path = [f"pci-{controllers[-1]}"] if controllers else []
+    path += [p for p in parts if USB_ROOT_HUB.match(p)][:1]
+    path += [f"hub-{p}" for p in [p for p in parts if USB_PORT.match(p)][:-1]]
+    return tuple(path)
+
+
+class DeviceRecord:
+    """One mounted partition as seen in a single inventory snapshot"""
+    def __init__(self, device, mountpoint, fstype='', opts='', serial=None, identity=None, removable=False, bus=()):
+        self.device = device
+        self.mountpoint = mountpoint
+        self.fstype = fstype
+        self.opts = opts
+        self.serial = serial
+        # Stable key for the physical medium; mount strings get reused across sticks
+        self.identity = identity or f"{device}@{mountpoint}"
+        self.removable = removable
+        self.bus = tuple(bus)  # shared controller/hub links, outermost first (empty if unknown)
+
+    def fingerprint(self):
+        return (self.device, self.mountpoint, self.fstype, self.opts)
+
+    def to_dict(self):
+        return {
+            'device': self.device,
+            'mountpoint': self.mountpoint,
+            'fstype': self.fstype,
+            'opts': self.opts,
+            'serial': self.serial,
+            'identity': self.identity,
+            'removable': self.removable,
+            'bus': list(self.bus),
+        }
+
+    def __repr__(self):
+        return f"DeviceRecord({self.device!r}, {self.mountpoint!r}, identity={self.identity!r})"
+
+
+class InventoryDiff:
+    """Changes between two consecutive snapshots"""
+    def __init__(self, added=None, removed=None, changed=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []  # (old, new) pairs
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f"InventoryDiff(added={self.added}, removed={self.removed}, changed={len(self.changed)})"
+
+
+class DeviceInventory:
+    """Takes one partition snapshot per cycle and indexes it by device, serial and mountpoint"""
+    def __init__(self, scanner=None):
+        self.scanner = scanner or psutil.disk_partitions
+        self.by_identity = {}
+        self.by_device = {}
+        self.by_serial = {}
+        self.by_mountpoint = {}
+        self.buses = {}  # (identity, block device) -> bus path; sysfs walks only for media not seen before
+
+    def linux_ids(self):
+        """Map resolved block device paths to their /dev/disk/by-id names (one listdir per scan)"""
+        ids = {}
+        try:
+            names = os.listdir(BY_ID_DIR)
+        except OSError:
+            return ids
+        for name in sorted(names):
+            if name.startswith(('wwn-', 'nvme-eui.')):
+                continue
+            target = os.path.realpath(os.path.join(BY_ID_DIR, name))
+            ids.setdefault(target, name)
+        return ids
+
+    def windows_volume_serial(self, mountpoint):
+        try:
+            import ctypes
+            serial = ctypes.c_uint32()
+            ok = ctypes.windll.kernel32.GetVolumeInformationW(
+                ctypes.c_wchar_p(mountpoint), None, 0, ctypes.byref(serial), None, None, None, 0
+            )
+            return f"{serial.value:08X}" if ok else None
+        except Exception:
+            return None
+
+    def linux_bus(self, device, identity=None):
+        """Bus path of a partition's block device, from sysfs (cached per medium identity)"""
+        name = os.path.basename(os.path.realpath(device))
+        key = (identity, name)
+        if identity is not None and key in self.buses:
+            return self.buses[key]
+        bus = bus_path(os.path.realpath(os.path.join(SYS_BLOCK_DIR, name)))
+        if identity is not None:
+            self.buses[key] = bus
+        return bus
+
+    def identify(self, partition, linux_ids):
+        """Work out serial and identity for a partition
+
+        Resolved on every scan: a different stick can come up on the same
+        device node and mountpoint, so nothing is inherited from the last one.
+        """
+        if sys.platform == 'win32':
+            serial = self.windows_volume_serial(partition.mountpoint)
+            return serial, (f"vol-{serial}" if serial else None)
+
+        by_id = linux_ids.get(os.path.realpath(partition.device)) if linux_ids else None
+        if by_id:
+            # usb-Vendor_Model_SERIAL-0:0-part1 -> serial of the medium, identity per partition
+            return by_id.rsplit('-part', 1)[0], by_id
+        return None, None
+
+    def scan(self):
+        """Take a single snapshot of all mounted partitions"""
+        linux_ids = self.linux_ids() if sys.platform.startswith('linux') else None
+        records = []
+        for partition in self.scanner():
+            serial, identity = self.identify(partition, linux_ids)
+            removable = 'removable' in partition.opts or bool(identity and identity.startswith('usb-'))
+            bus = self.linux_bus(partition.device, identity) if linux_ids is not None else ()
+            records.append(DeviceRecord(
+                partition.device, partition.mountpoint, partition.fstype, partition.opts,
+                serial=serial, identity=identity, removable=removable, bus=bus
+            ))
+        return records
+
+    def refresh(self):
+        """Rescan once, swap in the new indexes and return what changed"""
+        records = self.scan()
+        current = {record.identity: record for record in records}
+
+        added = [record for key, record in current.items() if key not in self.by_identity]
+        removed = [record for key, record in self.by_identity.items() if key not in current]
+        changed = [
+            (self.by_identity[key], record) for key, record in current.items()
+            if key in self.by_identity and self.by_identity[key].fingerprint() != record.fingerprint()
+        ]
+
+        by_serial = {}
+        for record in records:
+            if record.serial:
+                by_serial.setdefault(record.serial, []).append(record)
+        self.by_identity = current
+        self.by_device = {record.device: record for record in records}
+        self.by_mountpoint = {record.mountpoint: record for record in records}
+        self.by_serial = by_serial
+        self.buses = {key: bus for key, bus in self.buses.items() if key[0] in current}
+        return InventoryDiff(added, removed, changed)
+
+    def get(self, key):
+        """Look up a record by identity, device or mountpoint"""
+        return self.by_identity.get(key) or self.by_device.get(key) or self.by_mountpoint.get(key)
+
+    def records(self):
+        return list(self.by_identity.values())
@@ -2,34 +2,28 @@
 """
 Quick fix to restore access to USB drives
 """
-import subprocess
-import os
+import sys
+from remediation import DEFAULT_WORKERS, ReleaseEngine, drive_root, print_step, print_summary
 
-def fix_drive_access(drive):
-    """Remove any denials and restore access"""
-    print(f"🔧 Fixing access to {drive}...")
+def fix_drive_access(drives, runner=None, workers=None):
+    """Remove any denials and restore access on one drive or many"""
+    drives = [drives] if isinstance(drives, str) else list(drives)
+    print(f"🔧 Fixing access to {', '.join(drive_root(d) for d in drives)}...")
     
-    # Commands to restore normal access
-    commands = [
-        f'icacls {drive} /remove:d Everyone',
-        f'icacls {drive} /grant Everyone:(F)',
-        f'icacls {drive} /grant Users:(F)',
-        f'attrib -R {drive}\\* /S /D'
-    ]
+    engine = ReleaseEngine(runner, workers=workers or DEFAULT_WORKERS)
+    report = engine.release(drives, 'fix_access', progress=print_step)
+    print_summary(report)
     
-    for cmd in commands:
-        try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                print(f"✅ {cmd.split()[0]} successful")
-            else:
-                print(f"⚠️ {cmd.split()[0]} failed")
-        except Exception as e:
-            print(f"⚠️ Error: {e}")
-    
-    print(f"🎉 Access restored to {drive}")
-    print("You should now be able to read and write to the drive")
+    if report['ok']:
+        print("You should now be able to read and write to the drive")
+    else:
+        print("❌ Some steps failed:")
+        for drive, result in report['drives'].items():
+            for step in result['steps']:
+                if not step['ok']:
+                    print(f"   {drive} {step['step']}: {step['error'] or 'failed'}")
+    return report
 
 if __name__ == "__main__":
-    drive = "D:\\"  # Change to your USB drive letter
-    fix_drive_access(drive)
\ No newline at end of file
+    drives = sys.argv[1:] or ["D:\\"]  # e.g. fix_access.py D: E: F:
+    fix_drive_access(drives)
\ No newline at end of file
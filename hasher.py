@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Evidence Hasher
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_ALGORITHMS = ('md5', 'sha1', 'sha256')
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# Above this size a file's digests are updated in parallel while the next chunk is read
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+
+
+def iter_files(root):
+    """Yield every regular file below root without following symlinks"""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class EvidenceHasher:
+    """Hashes each file once with several algorithms, many files at a time"""
+    def __init__(self, algorithms=DEFAULT_ALGORITHMS, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, chunk_digests=False):
+        self.algorithms = tuple(algorithms)
+        self.chunk_size = chunk_size
+        # Per-chunk SHA-256 leaves for Merkle manifests, computed from the same read
+        self.chunk_digests = chunk_digests
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        self.local = threading.local()
+        self.digest_pool = None
+        self.digest_pool_lock = threading.Lock()
+
+    def buffers(self):
+        """Two preallocated read buffers per worker thread, reused for every file"""
+        buffers = getattr(self.local, 'buffers', None)
+        if buffers is None:
+            buffers = self.local.buffers = (bytearray(self.chunk_size), bytearray(self.chunk_size))
+        return buffers
+
+    def get_digest_pool(self):
+        with self.digest_pool_lock:
+            if self.digest_pool is None:
+                self.digest_pool = ThreadPoolExecutor(
+                    max_workers=len(self.algorithms), thread_name_prefix='digest'
+                )
+            return self.digest_pool
+
+    def hash_file(self, path, throttle=None):
+        """Hash a single file in one pass; returns a result dict
+
+        throttle(nbytes), if given, is called after every read (see scheduler.py).
+        """
+        started = time.perf_counter()
+        digests = [hashlib.new(name) for name in self.algorithms]
+        chunks = [] if self.chunk_digests else None
+        size = 0
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                st = os.fstat(f.fileno())
+                if st.st_size >= LARGE_FILE_SIZE and len(digests) > 1:
+                    size = self.stream_parallel(f, digests, chunks, throttle)
+                else:
+                    size = self.stream(f, digests, chunks, throttle)
+        except OSError as e:
+            return {'path': path, 'size': size, 'error': str(e)}
+
+        result = {
+            'path': path,
+            'size': size,
+            'mtime_ns': st.st_mtime_ns,
+            'inode': st.st_ino,
+            'hashes': {name: d.hexdigest() for name, d in zip(self.algorithms, digests)},
+            'elapsed': time.perf_counter() - started,
+        }
+        if chunks is not None:
+            result['chunks'] = chunks
+        return result
+
+    def stream(self, f, digests, chunks=None, throttle=None):
+        buf = self.buffers()[0]
+        size = 0
+        with memoryview(buf) as view:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                if throttle:
+                    throttle(n)
+                chunk = view[:n]
+                for d in digests:
+                    d.update(chunk)
+                if chunks is not None:
+                    chunks.append(hashlib.sha256(chunk).hexdigest())
+                size += n
+        return size
+
+    def stream_parallel(self, f, digests, chunks=None, throttle=None):
+        """Double-buffered: read chunk N+1 while every algorithm digests chunk N"""
+        pool = self.get_digest_pool()
+        views = [memoryview(buf) for buf in self.buffers()]
+        pending = []
+        size = 0
+        current = 0
+        try:
+            while True:
+                n = f.readinto(views[current])
+                for future in pending:
+                    future.result()
+                if not n:
+                    break
+                if throttle:
+                    throttle(n)
+                chunk = views[current][:n]
+                pending = [pool.submit(d.update, chunk) for d in digests]
+                if chunks is not None:
+                    chunks.append(hashlib.sha256(chunk).hexdigest())
+                size += n
+                current ^= 1
+        finally:
+            for future in pending:
+                future.result()
+            for view in views:
+                view.release()
+        return size
+
+    def hash_paths(self, paths, progress=None, throttle=None):
+        """Hash many files across the thread pool; hashlib releases the GIL while digesting"""
+        started = time.perf_counter()
+        results = []
+        total_bytes = 0
+        errors = 0
+        max_in_flight = self.workers * 4
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hasher') as pool:
+            in_flight = set()
+
+            def collect(done):
+                nonlocal total_bytes, errors
+                for future in done:
+                    result = future.result()
+                    results.append(result)
+                    total_bytes += result['size']
+                    if 'error' in result:
+                        errors += 1
+                    if progress:
+                        progress(result)
+
+            # Keep the queue bounded so a million-file volume doesn't queue a million futures
+            for path in paths:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(self.hash_file, path, throttle))
+            done, _ = wait(in_flight)
+            collect(done)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'files': len(results),
+            'bytes': total_bytes,
+            'errors': errors,
+            'elapsed': elapsed,
+            'mb_per_s': (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0,
+            'algorithms': list(self.algorithms),
+            'results': results,
+        }
+
+    def hash_tree(self, root, progress=None, throttle=None):
+        """Hash every file on a (protected) volume"""
+        report = self.hash_paths(iter_files(root), progress, throttle)
+        report['root'] = root
+        return report
+
+    def close(self):
+        with self.digest_pool_lock:
+            if self.digest_pool is not None:
+                self.digest_pool.shutdown()
+                self.digest_pool = None
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "D:\\"
+    hasher = EvidenceHasher()
+    print(f"🔐 Hashing evidence on {target} ({', '.join(hasher.algorithms)})...")
+    report = hasher.hash_tree(target)
+    hasher.close()
+    for result in report['results']:
+        if 'error' in result:
+            print(f"   ⚠️ {result['path']}: {result['error']}")
+        else:
+            print(f"   {result['hashes']['sha256']}  {result['path']}")
+    print(f"✅ {report['files']} files, {report['bytes'] / (1024 * 1024):.1f} MB "
+          f"in {report['elapsed']:.2f}s ({report['mb_per_s']:.1f} MB/s)")
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Known-File Hash Sets
+"""
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:  # bulk lookups fall back to one digest at a time
+    np = None
+
+MAGIC = b'FSHSET01'
+# magic, digest size, bloom hash count, entries, bloom bytes, label
+HEADER = struct.Struct('<8sHHQQ16s')
+HEADER_SIZE = 64
+DIGEST_SIZES = {'md5': 16, 'sha1': 20, 'sha256': 32}
+BLOOM_BITS_PER_ENTRY = 10  # ~1% false positives with 7 hash functions
+BLOOM_HASHES = 7
+DEFAULT_RUN_SIZE = 4000000
+BUCKETS = 256  # merge phase works on one leading-byte bucket at a time
+MASK64 = (1 << 64) - 1
+KNOWN_GOOD = 'known-good'
+KNOWN_BAD = 'known-bad'
+HEX = re.compile(rb'\b[0-9A-Fa-f]+\b')
+
+
+def parse_digests(lines, digest_size):
+    """Raw digests from a text list: plain hex per line or NSRL-style CSV (first hex field of the right length)"""
+    width = digest_size * 2
+    for line in lines:
+        for token in HEX.findall(line):
+            if len(token) == width:
+                yield bytes.fromhex(token.decode())
+                break
+
+
+def bloom_positions(digest, bits, k):
+    """Double hashing straight from the digest bytes (they are already uniformly distributed)
+
+    Arithmetic wraps at 64 bits so the vectorized path computes the same positions.
+    """
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [((h1 + i * h2) & MASK64) % bits for i in range(k)]
+
+
+def bloom_positions_many(digests, bits, k):
+    """bloom_positions for an (n, digest_size) uint8 array; returns a (k, n) array"""
+    words = digests[:, :16].copy().view('<u8')
+    h1, h2 = words[:, 0], words[:, 1] | np.uint64(1)
+    return np.stack([(h1 + np.uint64(i) * h2) % np.uint64(bits) for i in range(k)])
+
+
+class RunWriter:
+    """External sort, phase one: sorted runs of at most run_size digests on disk"""
+    def __init__(self, digest_size, run_size, directory):
+        self.digest_size = digest_size
+        self.run_size = run_size
+        self.directory = directory
+        self.run = []
+        self.paths = []
+
+    def add(self, digest):
+        self.run.append(digest)
+        if len(self.run) >= self.run_size:
+            self.flush()
+
+    def flush(self):
+        if not self.run:
+            return
+        self.run.sort()
+        f = tempfile.NamedTemporaryFile(dir=self.directory, prefix='hashset-run-', delete=False)
+        with f:
+            f.write(b''.join(self.run))
+        self.paths.append(f.name)
+        self.run = []
+
+
+def merge_runs(paths, digest_size):
+    """Phase two: yield the merged set one leading-byte bucket at a time, sorted and de-duplicated
+
+    Every run is sorted, so each bucket is one contiguous slice of each run
+    (found by bisecting the mapped run); only about 1/256 of the set is in
+    memory at once.
+    """
+    files = [open(path, 'rb') for path in paths]
+    maps = [mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) for f in files if os.fstat(f.fileno()).st_size]
+    try:
+        bounds = [bucket_bounds(m, digest_size) for m in maps]
+        for bucket in range(BUCKETS):
+            data = b''.join(m[b[bucket] * digest_size:b[bucket + 1] * digest_size] for m, b in zip(maps, bounds))
+            if not data:
+                continue
+            if np is not None:
+                yield np.unique(np.frombuffer(data, dtype=f'S{digest_size}')).tobytes()
+            else:
+                yield b''.join(sorted({data[i:i + digest_size] for i in range(0, len(data), digest_size)}))
+    finally:
+        for m in maps:
+            m.close()
+        for f in files:
+            f.close()
+
+
+def bucket_bounds(run, digest_size):
+    """Index of the first entry of every leading-byte bucket in a sorted run (plus the end)"""
+    count = len(run) // digest_size
+    bounds = []
+    low = 0
+    for bucket in range(BUCKETS):
+        high = count
+        while low < high:
+            middle = (low + high) // 2
+            if run[middle * digest_size] < bucket:
+                low = middle + 1
+            else:
+                high = middle
+        bounds.append(low)
+    bounds.append(count)
+    return bounds
+
+
+def build_hash_set(sources, output, algorithm='sha1', label=KNOWN_GOOD, run_size=DEFAULT_RUN_SIZE, progress=None):
+    """Import reference lists into one sorted, de-duplicated binary set with a Bloom filter in front"""
+    started = time.perf_counter()
+    digest_size = DIGEST_SIZES[algorithm]
+    runs = RunWriter(digest_size, run_size, os.path.dirname(os.path.abspath(output)))
+    imported = 0
+    try:
+        for source in sources:
+            with open(source, 'rb') as f:
+                for digest in parse_digests(f, digest_size):
+                    runs.add(digest)
+                    imported += 1
+                    if progress and imported % 1000000 == 0:
+                        progress(imported)
+        runs.flush()
+
+        # Sized for the pre-dedup count, which only lowers the false-positive rate
+        bloom = bytearray((max(64, imported * BLOOM_BITS_PER_ENTRY) + 7) // 8)
+        bloom_bits = len(bloom) * 8
+        count = 0
+        with open(output + '.tmp', 'wb') as out:
+            out.write(bytes(HEADER_SIZE + len(bloom)))
+            for data in merge_runs(runs.paths, digest_size):
+                out.write(data)
+                count += len(data) // digest_size
+                if np is not None:
+                    positions = bloom_positions_many(
+                        np.frombuffer(data, dtype=np.uint8).reshape(-1, digest_size), bloom_bits, BLOOM_HASHES
+                    ).ravel()
+                    bits = np.frombuffer(bloom, dtype=np.uint8)
+                    np.bitwise_or.at(bits, positions >> np.uint64(3),
+                                     (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+                else:
+                    for i in range(0, len(data), digest_size):
+                        for bit in bloom_positions(data[i:i + digest_size], bloom_bits, BLOOM_HASHES):
+                            bloom[bit >> 3] |= 1 << (bit & 7)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, digest_size, BLOOM_HASHES, count, len(bloom), label.encode()[:16]))
+            out.seek(HEADER_SIZE)
+            out.write(bloom)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(output + '.tmp', output)
+    finally:
+        for path in runs.paths:
+            os.remove(path)
+    return {'imported': imported, 'unique': count, 'elapsed': time.perf_counter() - started}
+
+
+class HashSet:
+    """Read-only, memory-mapped sorted digest set; nothing is loaded into Python objects"""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest_size, self.bloom_hashes, self.count, bloom_bytes, label = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a hash set")
+        self.label = label.rstrip(b'\0').decode()
+        self.algorithm = {size: name for name, size in DIGEST_SIZES.items()}[self.digest_size]
+        self.bloom_start = HEADER_SIZE
+        self.bloom_bits = bloom_bytes * 8
+        self.data_start = HEADER_SIZE + bloom_bytes
+        if np is not None:
+            # Zero-copy views straight over the mapping
+            self.bloom_array = np.frombuffer(self.map, dtype=np.uint8, count=bloom_bytes, offset=self.bloom_start)
+            self.entries = np.frombuffer(self.map, dtype=f'S{self.digest_size}', count=self.count,
+                                         offset=self.data_start)
+
+    def __len__(self):
+        return self.count
+
+    def might_contain(self, digest):
+        m = self.map
+        start = self.bloom_start
+        for bit in bloom_positions(digest, self.bloom_bits, self.bloom_hashes):
+            if not m[start + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def search(self, digest):
+        """Interpolation guess from the leading 8 bytes, then binary search inside a small window"""
+        m, size, base, count = self.map, self.digest_size, self.data_start, self.count
+        if not count:
+            return False
+        guess = int.from_bytes(digest[:8], 'big') * count >> 64
+        low, high = 0, count
+        # Uniform digests put the answer within a few dozen entries of the guess; widen until bracketed
+        span = 64
+        while True:
+            lo = max(0, guess - span)
+            hi = min(count, guess + span)
+            if (lo == 0 or m[base + lo * size:base + (lo + 1) * size] <= digest) and \
+                    (hi == count or m[base + (hi - 1) * size:base + hi * size] >= digest):
+                low, high = lo, hi
+                break
+            span *= 4
+        while low < high:
+            middle = (low + high) // 2
+            entry = m[base + middle * size:base + (middle + 1) * size]
+            if entry < digest:
+                low = middle + 1
+            elif entry > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __contains__(self, digest):
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        return self.might_contain(digest) and self.search(digest)
+
+    def contains_many(self, digests):
+        """Membership for a batch of raw digests; vectorized Bloom test and searchsorted with NumPy"""
+        if np is None or not digests:
+            return [digest in self for digest in digests]
+        queries = np.array(digests, dtype=f'S{self.digest_size}')
+        raw = queries.view(np.uint8).reshape(-1, self.digest_size)
+        positions = bloom_positions_many(raw, self.bloom_bits, self.bloom_hashes)
+        bits = self.bloom_array[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        candidates = np.flatnonzero((bits & 1).all(axis=0))
+        found = np.zeros(len(digests), dtype=bool)
+        if len(candidates) and self.count:
+            wanted = queries[candidates]
+            order = np.argsort(wanted)  # sorted probes walk the mapping front to back
+            index = np.searchsorted(self.entries, wanted[order])
+            index[index >= self.count] = 0
+            found[candidates[order]] = self.entries[index] == wanted[order]
+        return found.tolist()
+
+    def close(self):
+        self.entries = self.bloom_array = None
+        self.map.close()
+        self.file.close()
+
+
+def open_hash_sets(paths):
+    return [HashSet(path) for path in paths]
+
+
+def classify_many(hash_rows, hash_sets):
+    """Label per file for a batch of {algorithm: hex} dicts; known-bad wins over known-good"""
+    labels = [None] * len(hash_rows)
+    for hash_set in hash_sets:
+        positions, digests = [], []
+        for i, hashes in enumerate(hash_rows):
+            digest = hashes.get(hash_set.algorithm)
+            if digest and labels[i] != KNOWN_BAD:
+                positions.append(i)
+                digests.append(bytes.fromhex(digest))
+        for i, hit in zip(positions, hash_set.contains_many(digests)):
+            if hit and (labels[i] is None or hash_set.label == KNOWN_BAD):
+                labels[i] = hash_set.label
+    return labels
+
+
+def tag_results(results, hash_sets):
+    """Add 'known' to EvidenceHasher results in place; returns counts per label"""
+    hashed = [result for result in results if 'hashes' in result]
+    counts = {}
+    for result, label in zip(hashed, classify_many([r['hashes'] for r in hashed], hash_sets)):
+        if label:
+            result['known'] = label
+            counts[label] = counts.get(label, 0) + 1
+    return counts
+
+
+def tag_catalog(catalog, hash_sets, batch_size=50000):
+    """Set the known column for every hashed file in an indexer catalog, one transaction per batch"""
+    counts = {}
+    last = 0
+    while True:
+        # Keyset paging on rowid so no read cursor is open while we write
+        rows = catalog.db.execute(
+            "SELECT rowid, path, md5, sha1, sha256 FROM files WHERE rowid > ? "
+            "AND (md5 IS NOT NULL OR sha1 IS NOT NULL OR sha256 IS NOT NULL) ORDER BY rowid LIMIT ?",
+            (last, batch_size)).fetchall()
+        if not rows:
+            return counts
+        last = rows[-1][0]
+        labels = classify_many([{'md5': row[2], 'sha1': row[3], 'sha256': row[4]} for row in rows], hash_sets)
+        catalog.set_known([(label, row[1]) for row, label in zip(rows, labels)])
+        for label in labels:
+            if label:
+                counts[label] = counts.get(label, 0) + 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('import', 'lookup'):
+        print("Usage: hashset.py import <set.fsh> <md5|sha1|sha256> <known-good|known-bad> <list>...")
+        print("       hashset.py lookup <set.fsh> <hex digest>...")
+        sys.exit(1)
+    if sys.argv[1] == 'import':
+        output, algorithm, label, sources = sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5:]
+        print(f"📥 Importing {len(sources)} list(s) into {output} ({algorithm}, {label})...")
+        result = build_hash_set(sources, output, algorithm, label,
+                                progress=lambda n: print(f"\r   {n:,} hashes read", end=''))
+        print()
+        print(f"✅ {result['unique']:,} unique hashes ({result['imported']:,} read) in {result['elapsed']:.1f}s")
+    else:
+        hash_set = HashSet(sys.argv[2])
+        for digest in sys.argv[3:]:
+            print(f"   {digest}: {hash_set.label if digest in hash_set else 'unknown'}")
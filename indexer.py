@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Evidence File-System Indexer
+"""
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from manifest import relative, safe_name
+
+CATALOG_DIR = 'catalogs'
+DEFAULT_BATCH_SIZE = 5000
+# Batches waiting for the writer; scanners block beyond this, which bounds memory
+MAX_PENDING_BATCHES = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER,
+    atime_ns INTEGER,
+    ctime_ns INTEGER,
+    mode INTEGER,
+    inode INTEGER,
+    attributes INTEGER,
+    md5 TEXT,
+    sha1 TEXT,
+    sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files(parent);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+FILE_COLUMNS = ('path', 'parent', 'name', 'ext', 'size', 'mtime_ns', 'atime_ns', 'ctime_ns',
+                'mode', 'inode', 'attributes', 'md5', 'sha1', 'sha256')
+INSERT_FILE = (f"INSERT OR REPLACE INTO files ({', '.join(FILE_COLUMNS)}) "
+               f"VALUES ({', '.join('?' * len(FILE_COLUMNS))})")
+# Filled in after indexing (hash-set tagging, signature classification); added to older catalogs on open
+ANALYSIS_COLUMNS = (('known', 'TEXT'), ('file_type', 'TEXT'), ('type_mismatch', 'INTEGER'))
+INSERT_DIR = "INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)"
+
+
+def catalog_path(identity, directory=CATALOG_DIR):
+    return os.path.join(directory, f"{safe_name(identity)}.db")
+
+
+def storable(text):
+    """Names that aren't valid UTF-8 (surrogate-escaped by os) are stored with \\x escapes;
+    SQLite text has to be UTF-8"""
+    try:
+        text.encode('utf-8')
+        return text
+    except UnicodeEncodeError:
+        return text.encode('utf-8', 'surrogateescape').decode('utf-8', 'backslashreplace')
+
+
+def file_row(rel, st, hashes=None):
+    """Catalog row for one file from its stat result"""
+    rel = storable(rel)
+    parent, _, name = rel.rpartition('/')
+    hashes = hashes or {}
+    return (
+        rel, parent, name, os.path.splitext(name)[1].lower(), st.st_size,
+        st.st_mtime_ns, st.st_atime_ns, st.st_ctime_ns, st.st_mode, st.st_ino,
+        getattr(st, 'st_file_attributes', None),  # Windows only (hidden/system/archive...)
+        hashes.get('md5'), hashes.get('sha1'), hashes.get('sha256'),
+    )
+
+
+class Catalog:
+    """Per-device SQLite catalog of every file on the volume"""
+    def __init__(self, path, readonly=False):
+        self.path = path
+        if readonly:
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+            columns = {row[1] for row in self.db.execute("PRAGMA table_info(files)")}
+            for column, kind in ANALYSIS_COLUMNS:
+                if column not in columns:
+                    self.db.execute(f"ALTER TABLE files ADD COLUMN {column} {kind}")
+            self.db.execute("CREATE INDEX IF NOT EXISTS files_mismatch ON files(type_mismatch)")
+        self.db.row_factory = sqlite3.Row
+
+    def insert(self, files=(), dirs=(), removed=(), removed_dirs=()):
+        """Write one batch of rows (and deletions) in a single transaction"""
+        with self.db:
+            if files:
+                self.db.executemany(INSERT_FILE, files)
+            if dirs:
+                self.db.executemany(INSERT_DIR, dirs)
+            if removed:
+                self.db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            if removed_dirs:
+                self.db.executemany("DELETE FROM dirs WHERE path = ?", [(path,) for path in removed_dirs])
+
+    def reset(self):
+        """Drop everything from a previous index run"""
+        with self.db:
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM dirs")
+
+    def set_meta(self, **values):
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                [(key, str(value)) for key, value in values.items()])
+
+    def meta(self):
+        return {row['key']: row['value'] for row in self.db.execute("SELECT key, value FROM meta")}
+
+    def update_hashes(self, results, root):
+        """Fill in hash columns from EvidenceHasher results"""
+        rows = [
+            (r['hashes'].get('md5'), r['hashes'].get('sha1'), r['hashes'].get('sha256'),
+             storable(relative(root, r['path'])))
+            for r in results if 'hashes' in r
+        ]
+        with self.db:
+            self.db.executemany("UPDATE files SET md5 = ?, sha1 = ?, sha256 = ? WHERE path = ?", rows)
+
+    def set_known(self, updates):
+        """Store hash-set labels: (label or None, path) pairs"""
+        with self.db:
+            self.db.executemany("UPDATE files SET known = ? WHERE path = ?", updates)
+
+    def set_types(self, updates):
+        """Store signature classification: (file_type, mismatch, path) triples"""
+        with self.db:
+            self.db.executemany("UPDATE files SET file_type = ?, type_mismatch = ? WHERE path = ?", updates)
+
+    def summary(self):
+        row = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        dirs = self.db.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+        mismatches = self.db.execute("SELECT COUNT(*) FROM files WHERE type_mismatch = 1").fetchone()[0]
+        return {**self.meta(), 'files': row[0], 'bytes': row[1], 'dirs': dirs, 'type_mismatches': mismatches}
+
+    def query(self, prefix=None, ext=None, name=None, min_size=None, max_size=None, limit=100, offset=0,
+              known=None, file_type=None, mismatch=False):
+        """Files matching every given filter, in path order"""
+        clauses, params = [], []
+        if prefix:
+            clauses.append("path >= ? AND path < ?")  # range scan on the primary key
+            params += [prefix, prefix + '\uffff']
+        if ext:
+            clauses.append("ext = ?")
+            params.append(ext.lower() if ext.startswith('.') else '.' + ext.lower())
+        if name:
+            clauses.append("name LIKE ?")
+            params.append(f"%{name}%")
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        if known == 'unknown':
+            clauses.append("known IS NULL")
+        elif known:
+            clauses.append("known = ?")
+            params.append(known)
+        if file_type:
+            clauses.append("file_type = ?")
+            params.append(file_type)
+        if mismatch:
+            clauses.append("type_mismatch = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.db.execute(f"SELECT * FROM files {where} ORDER BY path LIMIT ? OFFSET ?",
+                               params + [limit, offset])
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+class FileIndexer:
+    """Walks a volume with parallel scandir workers; one writer batches rows into SQLite
+
+    In incremental mode each file's (size, mtime_ns, inode) is compared with
+    the previous catalog: unchanged files keep their row and stored hashes and
+    cost nothing but the stat, so only changes are hashed and written.
+    """
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE, hasher=None):
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 2)
+        self.batch_size = batch_size
+        self.hasher = hasher  # optional EvidenceHasher: hash new/modified files while scanning
+
+    def hashes_for(self, path):
+        return self.hasher.hash_file(path).get('hashes') if self.hasher else None
+
+    def index(self, root, catalog, progress=None, incremental=False):
+        """Index everything below root into catalog; returns a summary with the diff"""
+        started = time.perf_counter()
+        directories = queue.Queue()
+        batches = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+        outstanding = [1]  # directories queued or being scanned
+        abort = threading.Event()  # set on a fatal error: scanners stop walking and only drain
+        failures = []
+        lock = threading.Lock()
+        errors = []
+        added, removed, modified = [], [], []
+        seen_dirs = set()
+
+        previous_dirs = {}
+        if incremental and 'indexed_at' in catalog.meta():
+            previous_dirs = dict(catalog.db.execute("SELECT path, mtime_ns FROM dirs"))
+        else:
+            incremental = False
+            catalog.reset()
+
+        def scan():
+            reader = None
+            files, dirs, deleted = [], [], []
+            walked = walked_bytes = 0
+            try:
+                if incremental:
+                    # Each scanner reads the previous catalog through its own connection (WAL allows it)
+                    reader = sqlite3.connect(f"file:{catalog.path}?mode=ro", uri=True)
+            except sqlite3.Error as e:
+                failures.append(e)
+                abort.set()  # can't tell changes apart; stop the walk rather than report everything as added
+            try:
+                while True:
+                    item = directories.get()
+                    if item is None:
+                        break
+                    path, parent = item
+                    previous = {}
+                    try:
+                        if abort.is_set():
+                            continue  # only draining now (the finally still counts it)
+                        if reader is not None:
+                            previous = {row[0]: row[1:] for row in reader.execute(
+                                "SELECT name, size, mtime_ns, inode FROM files WHERE parent = ?", (storable(parent),))}
+                        with os.scandir(path) as entries:
+                            for entry in entries:
+                                try:
+                                    st = entry.stat(follow_symlinks=False)
+                                    rel = f"{parent}/{entry.name}" if parent else entry.name  # cheaper than relpath
+                                    if entry.is_dir(follow_symlinks=False):
+                                        stored = storable(rel)
+                                        seen_dirs.add(stored)
+                                        if previous_dirs.get(stored) != st.st_mtime_ns:
+                                            dirs.append((stored, st.st_mtime_ns))
+                                        with lock:
+                                            outstanding[0] += 1
+                                        directories.put((entry.path, rel))
+                                    elif entry.is_file(follow_symlinks=False):
+                                        walked += 1
+                                        walked_bytes += st.st_size
+                                        old = previous.pop(storable(entry.name), None)
+                                        if old is None:
+                                            if incremental:
+                                                added.append(rel)
+                                            files.append(file_row(rel, st, self.hashes_for(entry.path)))
+                                        elif old != (st.st_size, st.st_mtime_ns, st.st_ino):
+                                            modified.append(rel)
+                                            files.append(file_row(rel, st, self.hashes_for(entry.path)))
+                                        # else unchanged: keep the stored row and hashes
+                                except (OSError, ValueError) as e:
+                                    errors.append((entry.path, str(e)))
+                                if walked >= self.batch_size or len(files) + len(dirs) >= self.batch_size:
+                                    batches.put((files, dirs, deleted, walked, walked_bytes))
+                                    files, dirs, deleted = [], [], []
+                                    walked = walked_bytes = 0
+                    except Exception as e:  # one bad directory must not strand the rest of the walk
+                        errors.append((path, str(e)))
+                        previous = {}  # unreadable now; don't report its files as removed
+                    finally:
+                        # Whatever is left was in the catalog but is no longer in the directory
+                        for name in previous:
+                            rel = f"{storable(parent)}/{name}" if parent else name
+                            removed.append(rel)
+                            deleted.append(rel)
+                        with lock:
+                            outstanding[0] -= 1
+                            finished = outstanding[0] == 0
+                        if finished:
+                            for _ in range(self.workers):
+                                directories.put(None)  # wake every scanner so they can exit
+            finally:
+                if files or dirs or deleted or walked:
+                    batches.put((files, dirs, deleted, walked, walked_bytes))
+                if reader is not None:
+                    reader.close()
+
+        def run_scanners():
+            threads = [threading.Thread(target=scan, name=f'indexer-{i}', daemon=True)
+                       for i in range(self.workers)]
+            try:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            finally:
+                batches.put(None)
+
+        root_st = os.stat(root)
+        seen_dirs.add('')
+        if previous_dirs.get('') != root_st.st_mtime_ns:
+            catalog.insert(dirs=[('', root_st.st_mtime_ns)])
+        directories.put((root, ''))
+        threading.Thread(target=run_scanners, name='indexer-scan', daemon=True).start()
+
+        # SQLite has one writer anyway; doing it here keeps the connection on one thread
+        files_done = bytes_done = written = 0
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                files, dirs, deleted, walked, walked_bytes = batch
+                if files or dirs or deleted:
+                    catalog.insert(files, dirs, deleted)
+                written += len(files)
+                files_done += walked
+                bytes_done += walked_bytes
+                if progress:
+                    progress(files_done, bytes_done)
+        except BaseException:
+            # Scanners may be blocked on the full batch queue: stop them and drain until they have exited
+            abort.set()
+            while batches.get() is not None:
+                pass
+            raise
+        if failures:
+            raise failures[0]
+
+        # Directories that disappeared take every file catalogued below them
+        for rel in sorted(set(previous_dirs) - seen_dirs):
+            gone = [row[0] for row in catalog.db.execute("SELECT path FROM files WHERE parent = ?", (rel,))]
+            removed.extend(gone)
+            catalog.insert(removed=gone, removed_dirs=[rel])
+
+        elapsed = time.perf_counter() - started
+        catalog.set_meta(root=root, indexed_at=time.time(), files=files_done, bytes=bytes_done)
+        return {
+            'files': files_done,
+            'bytes': bytes_done,
+            'written': written,
+            'incremental': incremental,
+            'added': sorted(added),
+            'removed': sorted(removed),
+            'modified': sorted(modified),
+            'errors': errors,
+            'elapsed': elapsed,
+            'files_per_s': files_done / elapsed if elapsed > 0 else 0,
+        }
+
+
+def index_volume(root, identity=None, workers=None, hasher=None, progress=None, incremental=False):
+    """Index root into the catalog for identity (defaults to the root path)"""
+    catalog = Catalog(catalog_path(identity or root))
+    try:
+        catalog.set_meta(identity=identity or root)
+        return FileIndexer(workers, hasher=hasher).index(root, catalog, progress, incremental)
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: indexer.py <path> [--hash] [--incremental]")
+        sys.exit(1)
+    root = sys.argv[1]
+    hasher = None
+    if '--hash' in sys.argv:
+        from hasher import EvidenceHasher
+        hasher = EvidenceHasher()
+    print(f"🗂️ Indexing {root} -> {catalog_path(root)}...")
+    report = index_volume(root, hasher=hasher, incremental='--incremental' in sys.argv,
+                          progress=lambda files, size: print(f"\r   {files} files, {size / 1024 / 1024:.1f} MB", end=''))
+    print()
+    print(f"✅ {report['files']} files in {report['elapsed']:.2f}s ({report['files_per_s']:,.0f} files/s)")
+    if report['incremental']:
+        print(f"   {len(report['added'])} added, {len(report['removed'])} removed, "
+              f"{len(report['modified'])} modified, {report['written']} rows written")
+    for path, error in report['errors'][:20]:
+        print(f"   ⚠️ {path}: {error}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Streaming Log Export
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+FORMATS = {
+    'text': ('text/plain', 'txt'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+}
+CSV_FIELDS = ['seq', 'ts', 'time', 'level', 'device', 'message']
+FLUSH_BYTES = 64 * 1024
+
+
+def parse_time(value):
+    """Accept epoch seconds or an ISO 8601 timestamp"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def filter_records(records, start=None, end=None, levels=None, device=None):
+    """Lazily apply time-range, level and device filters"""
+    for record in records:
+        if start is not None and record['ts'] < start:
+            continue
+        if end is not None and record['ts'] >= end:
+            return  # records are in time order
+        if levels and record['level'] not in levels:
+            continue
+        if device and record.get('device') != device:
+            continue
+        yield record
+
+
+def render(records, fmt='text', header=None):
+    """Yield the export as text chunks of roughly FLUSH_BYTES"""
+    parts = []
+    size = 0
+
+    if fmt == 'text' and header:
+        parts.append(header)
+        size += len(header)
+    elif fmt == 'csv':
+        parts.append(','.join(CSV_FIELDS) + '\r\n')
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        if fmt == 'jsonl':
+            line = json.dumps(record) + '\n'
+        elif fmt == 'csv':
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([record.get(field) for field in CSV_FIELDS])
+            line = buffer.getvalue()
+        else:
+            line = f"[{record['time']}] {record['message']}\n"
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts)
+
+
+def encode(chunks, compress=False):
+    """UTF-8 encode, optionally gzip on the fly"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
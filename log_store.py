@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Log Store (in-memory ring + segmented on-disk journal)
+"""
+import bisect
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+DEFAULT_DIRECTORY = os.path.join('logs', 'journal')
+DEFAULT_RING_SIZE = 1000
+DEFAULT_SEGMENT_RECORDS = 100000
+OFFSET = struct.Struct('<Q')
+
+
+class LogStore:
+    """O(1) appends, constant memory, cursor reads over the full history
+
+    Every record is appended to the current on-disk segment (one JSON line)
+    and its byte offset to the segment's .idx file, so any sequence number
+    can be located with one seek. The newest records also stay in a ring.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, ring_size=DEFAULT_RING_SIZE,
+                 segment_records=DEFAULT_SEGMENT_RECORDS, max_segments=None):
+        self.directory = directory
+        self.ring = deque(maxlen=ring_size)
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        self.segments = []  # first seq of each segment, ascending
+        self.log_file = None
+        self.idx_file = None
+        self.segment_count = 0
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.next_seq = self.recover()
+
+    def segment_paths(self, first_seq):
+        base = os.path.join(self.directory, f"segment-{first_seq:012d}")
+        return base + '.log', base + '.idx'
+
+    def recover(self):
+        """Pick up existing segments after a restart"""
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith('segment-') and name.endswith('.idx'):
+                self.segments.append(int(name[len('segment-'):-len('.idx')]))
+        if not self.segments:
+            return 1
+        first = self.segments[-1]
+        count = self.repair_segment(first)
+        if count < self.segment_records:
+            self.open_segment(first, count)
+        # Warm the ring with the newest records
+        for record in self.iter_range(max(1, first + count - self.ring.maxlen), first + count):
+            self.ring.append(record)
+        return first + count
+
+    def repair_segment(self, first_seq):
+        """Cut a record torn by a crash mid-append; returns the number of complete records
+
+        The log and its .idx are truncated back to the last newline-terminated
+        record that has an index entry, so the next append starts on a fresh line.
+        """
+        log_path, idx_path = self.segment_paths(first_seq)
+        with open(idx_path, 'rb') as idx:
+            data = idx.read()
+        offsets = [offset for (offset,) in OFFSET.iter_unpack(data[:len(data) - len(data) % OFFSET.size])]
+        log_end = 0
+        try:
+            with open(log_path, 'rb') as log:
+                while offsets:
+                    log.seek(offsets[-1])
+                    line = log.readline()
+                    if line.endswith(b'\n'):
+                        log_end = offsets[-1] + len(line)
+                        break
+                    offsets.pop()
+        except FileNotFoundError:
+            offsets = []
+        if os.path.exists(log_path) and os.path.getsize(log_path) != log_end:
+            os.truncate(log_path, log_end)
+        if len(data) != len(offsets) * OFFSET.size:
+            os.truncate(idx_path, len(offsets) * OFFSET.size)
+        return len(offsets)
+
+    def open_segment(self, first_seq, count=0):
+        if self.log_file:
+            self.log_file.close()
+            self.idx_file.close()
+        log_path, idx_path = self.segment_paths(first_seq)
+        self.log_file = open(log_path, 'ab')
+        self.idx_file = open(idx_path, 'ab')
+        self.segment_count = count
+        if not self.segments or self.segments[-1] != first_seq:
+            self.segments.append(first_seq)
+            self.prune()
+
+    def prune(self):
+        if not self.max_segments:
+            return
+        while len(self.segments) > self.max_segments:
+            for path in self.segment_paths(self.segments.pop(0)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def append(self, message, level='INFO', device=None):
+        """Store one record; returns it (with its sequence number)"""
+        now = time.time()
+        with self.lock:
+            record = {
+                'seq': self.next_seq,
+                'ts': now,
+                'time': datetime.fromtimestamp(now).strftime('%H:%M:%S'),
+                'level': level,
+                'device': device,
+                'message': message,
+            }
+            if self.log_file is None or self.segment_count >= self.segment_records:
+                self.open_segment(self.next_seq)
+            self.idx_file.write(OFFSET.pack(self.log_file.tell()))
+            self.log_file.write(json.dumps(record).encode() + b'\n')
+            self.log_file.flush()
+            self.idx_file.flush()
+            self.segment_count += 1
+            self.next_seq += 1
+            self.ring.append(record)
+        return record
+
+    def tail(self, count):
+        """Newest `count` records from memory"""
+        with self.lock:
+            if count >= len(self.ring):
+                return list(self.ring)
+            return list(self.ring)[-count:]
+
+    def last_seq(self):
+        return self.next_seq - 1
+
+    def first_seq(self):
+        return self.segments[0] if self.segments else self.next_seq
+
+    def count(self):
+        return self.next_seq - self.first_seq()
+
+    def read(self, cursor, limit=100):
+        """Records with seq >= cursor, oldest first; pass last seq + 1 to continue"""
+        with self.lock:
+            if self.ring and cursor >= self.ring[0]['seq']:
+                start = cursor - self.ring[0]['seq']
+                return [self.ring[i] for i in range(start, min(len(self.ring), start + limit))]
+        records = []
+        for record in self.iter_range(cursor):
+            records.append(record)
+            if len(records) >= limit:
+                break
+        return records
+
+    def iter_range(self, start=None, end=None):
+        """Stream records from disk with start <= seq < end, one segment at a time"""
+        start = max(start or 1, self.first_seq())
+        end = end or self.next_seq
+        segments = list(self.segments)
+        position = max(0, bisect.bisect_right(segments, start) - 1)
+        for i in range(position, len(segments)):
+            first = segments[i]
+            if first >= end:
+                return
+            log_path, idx_path = self.segment_paths(first)
+            try:
+                with open(idx_path, 'rb') as idx, open(log_path, 'rb') as log:
+                    if start > first:
+                        idx.seek((start - first) * OFFSET.size)
+                        entry = idx.read(OFFSET.size)
+                        if len(entry) < OFFSET.size:
+                            continue
+                        log.seek(OFFSET.unpack(entry)[0])
+                    for line in log:
+                        if not line.endswith(b'\n'):
+                            return  # record still being written
+                        record = json.loads(line)
+                        if record['seq'] >= end:
+                            return
+                        yield record
+            except FileNotFoundError:
+                continue  # pruned underneath us
+
+    def read_record(self, seq):
+        """Fetch one record from disk by sequence number (one seek in the index, one in the log)"""
+        segments = list(self.segments)
+        position = bisect.bisect_right(segments, seq) - 1
+        if position < 0:
+            return None
+        log_path, idx_path = self.segment_paths(segments[position])
+        try:
+            with open(idx_path, 'rb') as idx, open(log_path, 'rb') as log:
+                idx.seek((seq - segments[position]) * OFFSET.size)
+                entry = idx.read(OFFSET.size)
+                if len(entry) < OFFSET.size:
+                    return None
+                log.seek(OFFSET.unpack(entry)[0])
+                line = log.readline()
+        except FileNotFoundError:
+            return None
+        return json.loads(line) if line.endswith(b'\n') else None
+
+    def find_seq(self, ts):
+        """First sequence number logged at or after `ts` (binary search over the index)"""
+        low, high = self.first_seq(), self.next_seq
+        while low < high:
+            middle = (low + high) // 2
+            record = self.read_record(middle)
+            if record is not None and record['ts'] < ts:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def clear_ring(self):
+        """Drop the in-memory tail (the on-disk journal is kept)"""
+        with self.lock:
+            self.ring.clear()
+
+    def close(self):
+        with self.lock:
+            if self.log_file:
+                self.log_file.close()
+                self.idx_file.close()
+                self.log_file = self.idx_file = None
+
+
+def format_record(record):
+    """Display form used by the dashboard: "[HH:MM:SS] message" """
+    return f"[{record['time']}] {record['message']}"
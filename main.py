@@ -19,12 +19,13 @@ def start_detector():
         
         # Connect detector to dashboard
         original_protect = shield.protect_device
-        def enhanced_protect_device(drive):
-            device_info = original_protect(drive)
+        def enhanced_protect_device(drive, *args):
+            device_info = original_protect(drive, *args)
             if device_info:
                 dashboard.update_status(device_info, f"USB Protected: {drive}")
             return device_info
         shield.protect_device = enhanced_protect_device
+        shield.pipeline.on_state_change = dashboard.update_device_state
         
         shield.start_monitoring()
     except Exception as e:
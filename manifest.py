@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Merkle Hash Manifests
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hasher import EvidenceHasher, iter_files
+
+MANIFEST_DIR = 'manifests'
+MANIFEST_VERSION = 1
+
+
+def safe_name(identity):
+    """Turn a device identity into something usable as a file name"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', identity).strip('_') or 'device'
+
+
+def manifest_path(identity, directory=MANIFEST_DIR):
+    return os.path.join(directory, f"{safe_name(identity)}.json")
+
+
+def merkle_root(leaves):
+    """Merkle root over hex chunk digests (leaf/node prefixes keep the two levels apart)"""
+    if not leaves:
+        return hashlib.sha256(b'').hexdigest()
+    level = [hashlib.sha256(b'\x00' + bytes.fromhex(leaf)).digest() for leaf in leaves]
+    while len(level) > 1:
+        paired = []
+        for i in range(0, len(level) - 1, 2):
+            paired.append(hashlib.sha256(b'\x01' + level[i] + level[i + 1]).digest())
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+def volume_root(files):
+    """Root over every file's path and Merkle root, in path order"""
+    leaves = [
+        hashlib.sha256(f"{path}\0{entry['root']}".encode()).hexdigest()
+        for path, entry in sorted(files.items())
+    ]
+    return merkle_root(leaves)
+
+
+def relative(root, path):
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def build_manifest(root, report, identity=None, chunk_size=None):
+    """Build a manifest from an EvidenceHasher report made with chunk_digests=True"""
+    files = {}
+    for result in report['results']:
+        if 'error' in result:
+            continue
+        files[relative(root, result['path'])] = {
+            'size': result['size'],
+            'mtime_ns': result['mtime_ns'],
+            'inode': result['inode'],
+            'hashes': result['hashes'],
+            'chunks': result['chunks'],
+            'root': merkle_root(result['chunks']),
+        }
+    return {
+        'version': MANIFEST_VERSION,
+        'identity': identity,
+        'created': datetime.now().isoformat(),
+        'chunk_size': chunk_size,
+        'files': files,
+        'volume_root': volume_root(files),
+    }
+
+
+def save_manifest(manifest, path):
+    """Write atomically so a crash never leaves a half-written manifest"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def hash_chunk(path, index, chunk_size, throttle=None):
+    """Re-read and hash a single chunk of a file"""
+    with open(path, 'rb', buffering=0) as f:
+        f.seek(index * chunk_size)
+        data = f.read(chunk_size)
+    if throttle:
+        throttle(len(data))
+    return hashlib.sha256(data).hexdigest()
+
+
+def merge_ranges(indexes, chunk_size, size):
+    """Collapse differing chunk indexes into (offset, length) byte ranges"""
+    ranges = []
+    for index in sorted(indexes):
+        offset = index * chunk_size
+        length = max(0, min(chunk_size, size - offset))
+        if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + length)
+        else:
+            ranges.append((offset, length))
+    return ranges
+
+
+def verify_manifest(root, manifest, deep=False, workers=None, throttle=None):
+    """Re-verify a volume against its manifest
+
+    Only files whose (size, mtime_ns, inode) changed are re-read, chunk by chunk
+    in parallel; deep=True re-reads everything (e.g. before court).
+    """
+    started = time.perf_counter()
+    chunk_size = manifest['chunk_size']
+    expected = manifest['files']
+    seen = set()
+    suspect = []
+    added = []
+
+    for path in iter_files(root):
+        rel = relative(root, path)
+        entry = expected.get(rel)
+        if entry is None:
+            added.append(rel)
+            continue
+        seen.add(rel)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if deep or (st.st_size, st.st_mtime_ns, st.st_ino) != (entry['size'], entry['mtime_ns'], entry['inode']):
+            suspect.append((rel, path, st.st_size))
+
+    missing = sorted(set(expected) - seen)
+
+    # One task per chunk so a single huge file is still re-read in parallel
+    current_chunks = {rel: {} for rel, _, _ in suspect}
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) + 2)) as pool:
+        futures = [
+            (rel, index, pool.submit(hash_chunk, path, index, chunk_size, throttle))
+            for rel, path, size in suspect
+            for index in range(-(-size // chunk_size))
+        ]
+        errors = {}
+        for rel, index, future in futures:
+            try:
+                current_chunks[rel][index] = future.result()
+            except OSError as e:
+                errors[rel] = str(e)
+
+    modified = {}
+    metadata_only = []
+    for rel, path, size in suspect:
+        if rel in errors:
+            modified[rel] = {'error': errors[rel]}
+            continue
+        old_chunks = expected[rel]['chunks']
+        new_chunks = [current_chunks[rel][i] for i in sorted(current_chunks[rel])]
+        differing = [
+            i for i in range(max(len(old_chunks), len(new_chunks)))
+            if i >= len(old_chunks) or i >= len(new_chunks) or old_chunks[i] != new_chunks[i]
+        ]
+        if differing or size != expected[rel]['size']:
+            modified[rel] = {
+                'old_size': expected[rel]['size'],
+                'new_size': size,
+                'ranges': merge_ranges(differing, chunk_size, max(size, expected[rel]['size'])),
+                'root': merkle_root(new_chunks),
+            }
+        else:
+            metadata_only.append(rel)
+
+    return {
+        'ok': not (modified or missing or added),
+        'volume_root': manifest['volume_root'],
+        'files_checked': len(seen),
+        'files_reread': len(suspect),
+        'chunks_reread': len(futures),
+        'metadata_only': metadata_only,
+        'modified': modified,
+        'missing': missing,
+        'added': added,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def create_manifest(root, identity=None, hasher=None):
+    """Hash a volume once and build its manifest"""
+    hasher = hasher or EvidenceHasher(chunk_digests=True)
+    report = hasher.hash_tree(root)
+    return build_manifest(root, report, identity, hasher.chunk_size), report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('create', 'verify'):
+        print("Usage: manifest.py create|verify <drive> [manifest.json] [--deep]")
+        sys.exit(1)
+    command, drive = sys.argv[1], sys.argv[2]
+    path = sys.argv[3] if len(sys.argv) > 3 and not sys.argv[3].startswith('--') else manifest_path(drive)
+
+    if command == 'create':
+        manifest, report = create_manifest(drive, identity=drive)
+        save_manifest(manifest, path)
+        print(f"✅ Manifest written: {path}")
+        print(f"   Files: {len(manifest['files'])} ({report['mb_per_s']:.1f} MB/s)")
+        print(f"   Volume root: {manifest['volume_root']}")
+    else:
+        result = verify_manifest(drive, load_manifest(path), deep='--deep' in sys.argv)
+        print(f"🔍 Verified {result['files_checked']} files in {result['elapsed']:.2f}s "
+              f"({result['files_reread']} re-read, {result['chunks_reread']} chunks)")
+        for rel, change in result['modified'].items():
+            print(f"   ❌ MODIFIED: {rel} {change.get('ranges', change.get('error'))}")
+        for rel in result['missing']:
+            print(f"   ❌ MISSING: {rel}")
+        for rel in result['added']:
+            print(f"   ⚠️ ADDED: {rel}")
+        print(f"🎯 RESULT: {'✅ INTACT' if result['ok'] else '❌ CHANGED'}")
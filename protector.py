@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Concurrent Protection Pipeline
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+from metrics import FAILURES
+
+DETECTED = 'detected'
+PROTECTING = 'protecting'
+VERIFYING = 'verifying'
+PROTECTED = 'protected'
+FAILED = 'failed'
+REMOVED = 'removed'  # only ever reported to on_state_change, never stored
+
+TRANSITIONS = {
+    DETECTED: {PROTECTING, FAILED},
+    PROTECTING: {VERIFYING, FAILED},
+    VERIFYING: {PROTECTED, FAILED},
+    PROTECTED: {DETECTED, PROTECTING, VERIFYING},  # re-protect / re-verify
+    FAILED: {DETECTED, PROTECTING},  # retry
+}
+
+# Lower number runs first
+PRIORITY_PROTECT = 0
+PRIORITY_VERIFY = 5
+PRIORITY_BACKGROUND = 10
+
+
+class DeviceState:
+    """Per-device protection state machine (detected → protecting → verifying → protected/failed)"""
+    def __init__(self, identity, drive):
+        self.identity = identity
+        self.drive = drive
+        self.state = DETECTED
+        self.error = None
+        self.history = [(DETECTED, time.time())]
+        self.cancelled = False
+
+    def to_dict(self):
+        return {
+            'identity': self.identity,
+            'drive': self.drive,
+            'state': self.state,
+            'error': self.error,
+            'updated_at': self.history[-1][1],
+            'history': [{'state': state, 'at': at} for state, at in self.history],
+        }
+
+
+class ProtectionJob:
+    def __init__(self, identity, func, args=(), name='protect', state=None):
+        self.identity = identity
+        self.func = func
+        self.args = args
+        self.name = name
+        self.state = state
+
+
+class ProtectionPipeline:
+    """Worker pools fed by priority queues so the monitor loop never blocks on protection
+
+    Protection jobs have workers of their own: hashing or imaging can run
+    for hours (and wait on a bus slot), and a newly inserted drive must not
+    stay writable until one of them finishes.
+    """
+    def __init__(self, workers=4, on_state_change=None, background_workers=2):
+        self.workers = workers
+        self.background_workers = background_workers
+        self.on_state_change = on_state_change
+        self.queue = queue.PriorityQueue()  # PRIORITY_PROTECT jobs
+        self.background = queue.PriorityQueue()  # everything else
+        self.sequence = itertools.count()  # FIFO tie-break within a priority
+        self.device_states = {}
+        self.discarded = set()  # removed devices; only a fresh DETECTED brings them back
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        if self.threads:
+            return
+        pools = [(self.queue, 'protector', self.workers), (self.background, 'background', self.background_workers)]
+        for jobs, name, count in pools:
+            for i in range(count):
+                thread = threading.Thread(target=self.worker, args=(jobs,), name=f"{name}-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self, wait=True):
+        for jobs, count in ((self.queue, self.workers), (self.background, self.background_workers)):
+            for _ in range(count):
+                jobs.put((float('inf'), next(self.sequence), None))
+        if wait:
+            for thread in self.threads:
+                thread.join()
+        self.threads = []
+
+    def submit(self, identity, func, args=(), priority=PRIORITY_PROTECT, name='protect'):
+        """Queue work for a device; returns immediately"""
+        self.start()
+        job = ProtectionJob(identity, func, args, name, self.device_states.get(identity))
+        jobs = self.queue if priority <= PRIORITY_PROTECT else self.background
+        jobs.put((priority, next(self.sequence), job))
+
+    def pending(self):
+        return self.queue.qsize() + self.background.qsize()
+
+    def worker(self, jobs):
+        while True:
+            _, _, job = jobs.get()
+            try:
+                if job is None:
+                    return
+                if job.state is not None and job.state.cancelled:
+                    continue
+                try:
+                    job.func(*job.args)
+                except Exception as e:
+                    logging.getLogger('forensic_shield').exception(
+                        f"Pipeline job '{job.name}' failed for {job.identity}: {e}",
+                        extra={'device': job.identity, 'step': job.name})
+                    FAILURES.labels(job.name).inc()
+                    # A failed follow-up job (e.g. hashing) doesn't undo a verified protection
+                    if self.state_of(job.identity) != PROTECTED:
+                        self.transition(job.identity, FAILED, error=f"{job.name}: {e}")
+            finally:
+                jobs.task_done()
+
+    def join(self):
+        """Wait until every queued job has finished"""
+        self.queue.join()
+        self.background.join()
+
+    def transition(self, identity, new_state, drive=None, error=None):
+        """Move a device to a new state; unknown devices start a fresh state machine
+
+        Returns None, changing nothing, for a device discarded while its job
+        was still running, so a removed drive never comes back as a ghost.
+        """
+        with self.lock:
+            if identity in self.discarded:
+                if new_state != DETECTED:
+                    return None
+                self.discarded.remove(identity)
+            state = self.device_states.get(identity)
+            if state is None or new_state == DETECTED:
+                # Direct protect_device() calls have no DETECTED step, so start wherever they are
+                state = DeviceState(identity, drive or (state.drive if state else identity))
+                self.device_states[identity] = state
+                if new_state != DETECTED:
+                    state.state = new_state
+                    state.history.append((new_state, time.time()))
+            if new_state != state.state:
+                if new_state not in TRANSITIONS[state.state]:
+                    raise ValueError(f"Invalid transition for {identity}: {state.state} -> {new_state}")
+                state.state = new_state
+                state.history.append((new_state, time.time()))
+            if drive:
+                state.drive = drive
+            state.error = error
+            snapshot = state.to_dict()
+        if self.on_state_change:
+            self.on_state_change(snapshot)
+        return snapshot
+
+    def discard(self, identity):
+        """Forget a removed device; queued jobs for it are skipped"""
+        with self.lock:
+            state = self.device_states.pop(identity, None)
+            if state is None:
+                return
+            self.discarded.add(identity)
+            state.cancelled = True
+            snapshot = state.to_dict()
+        snapshot['state'] = REMOVED
+        if self.on_state_change:
+            self.on_state_change(snapshot)
+
+    def tracked(self, identity):
+        """Whether a device is still known; call with self.lock held to act on the answer"""
+        return identity in self.device_states
+
+    def state_of(self, identity):
+        state = self.device_states.get(identity)
+        return state.state if state else None
+
+    def states(self):
+        """Snapshot of every device's state for the dashboard"""
+        with self.lock:
+            return [state.to_dict() for state in self.device_states.values()]
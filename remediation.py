@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Batch Drive Release
+"""
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import SUBPROCESS_TIMEOUTS
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+RETRY_DELAY = 0.5  # doubled after every failed attempt
+MODES = ('fix_access', 'full_reset')
+
+
+class CommandRunner:
+    """Runs a command without a shell; swap in FakeCommandRunner to test off Windows"""
+    def run(self, args, input=None, timeout=None):
+        try:
+            result = subprocess.run(args, input=input, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            SUBPROCESS_TIMEOUTS.labels(args[0]).inc()
+            return {'returncode': None, 'stdout': '', 'stderr': f"timed out after {timeout}s", 'timed_out': True}
+        except OSError as e:
+            return {'returncode': None, 'stdout': '', 'stderr': str(e)}
+        return {'returncode': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr}
+
+
+class FakeCommandRunner:
+    """Records every call; `failures` maps a command name to how many times it fails first"""
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def run(self, args, input=None, timeout=None):
+        with self.lock:
+            self.calls.append((list(args), input))
+            failing = self.failures.get(args[0], 0) > 0
+            if failing:
+                self.failures[args[0]] -= 1
+        if self.delay:
+            time.sleep(self.delay)
+        if failing:
+            return {'returncode': 5, 'stdout': '', 'stderr': 'Access is denied.'}
+        return {'returncode': 0, 'stdout': 'ok', 'stderr': ''}
+
+
+def drive_root(drive):
+    """'D', 'D:' or 'D:\\' -> 'D:\\'"""
+    return drive[0].upper() + ':\\'
+
+
+def drive_steps(drive, mode):
+    """Per-drive commands, in order; every grant goes in a single icacls pass over the tree"""
+    root = drive_root(drive)
+    if mode == 'fix_access':
+        return [
+            ('remove_deny', ['icacls', root, '/remove:d', 'Everyone'], 10),
+            ('grant', ['icacls', root, '/grant', 'Everyone:(F)', 'Users:(F)'], 60),
+            ('attrib', ['attrib', '-R', root + '*', '/S', '/D'], 120),
+        ]
+    return [
+        ('reset_acl', ['icacls', root, '/reset'], 15),
+        ('grant', ['icacls', root, '/grant', 'Everyone:F', 'Users:F', 'Administrators:F', '/T', '/C'], 300),
+        ('attrib', ['attrib', '-R', root + '*', '/S', '/D'], 300),
+        ('owner', ['icacls', root, '/setowner', 'Everyone', '/T', '/C'], 300),
+    ]
+
+
+def diskpart_script(drives):
+    """One diskpart session for every drive; noerr keeps one bad volume from ending the script"""
+    lines = []
+    for drive in drives:
+        lines += [f"select volume {drive[0].upper()} noerr", "attributes disk clear readonly noerr"]
+    lines.append("exit")
+    return "\n".join(lines) + "\n"
+
+
+class ReleaseEngine:
+    """Releases many drives at once (clears read-only, restores ACLs and attributes)
+
+    full_reset clears the disk read-only flag for all drives in one diskpart
+    run first, since ACL and attribute changes fail on a read-only disk.
+    Each drive's own steps then run in order, with different drives in
+    parallel up to `workers`. Failed steps are retried with backoff.
+    """
+    def __init__(self, runner=None, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, retry_delay=RETRY_DELAY):
+        self.runner = runner or CommandRunner()
+        self.workers = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def run_step(self, name, args, timeout, input=None):
+        """Run one command with retries; returns the step report
+
+        Only quick failures are retried: a command that hit its timeout would
+        most likely hang again, so that is final.
+        """
+        started = time.perf_counter()
+        delay = self.retry_delay
+        for attempt in range(1, self.retries + 2):
+            result = self.runner.run(args, input=input, timeout=timeout)
+            if result['returncode'] == 0 or result.get('timed_out') or attempt > self.retries:
+                break
+            time.sleep(delay)
+            delay *= 2
+        return {
+            'step': name,
+            'command': ' '.join(args),
+            'ok': result['returncode'] == 0,
+            'returncode': result['returncode'],
+            'attempts': attempt,
+            'error': None if result['returncode'] == 0 else (result['stderr'] or result['stdout']).strip()[:500],
+            'ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def release_drive(self, drive, mode, progress=None):
+        started = time.perf_counter()
+        steps = []
+        for name, args, timeout in drive_steps(drive, mode):
+            step = self.run_step(name, args, timeout)
+            steps.append(step)
+            if progress:
+                progress(drive, step)
+        return {
+            'drive': drive_root(drive),
+            'ok': all(step['ok'] for step in steps),
+            'steps': steps,
+            'ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def release(self, drives, mode='full_reset', progress=None):
+        """Release every drive; returns {'drives': {...}, 'diskpart': step or None, 'ok', 'elapsed'}"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        started = time.perf_counter()
+        drives = list(dict.fromkeys(drive_root(d) for d in drives))  # D:, d:\ and D:\ are one drive
+        diskpart = None
+        if mode == 'full_reset' and drives:
+            diskpart = self.run_step('diskpart', ['diskpart'], 30 + 5 * len(drives), input=diskpart_script(drives))
+            if progress:
+                progress(None, diskpart)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='release') as pool:
+            reports = list(pool.map(lambda drive: self.release_drive(drive, mode, progress), drives))
+        return {
+            'mode': mode,
+            'drives': {report['drive']: report for report in reports},
+            'diskpart': diskpart,
+            'ok': all(report['ok'] for report in reports) and (diskpart is None or diskpart['ok']),
+            'elapsed': time.perf_counter() - started,
+        }
+
+
+def print_step(drive, step):
+    label = f"{drive} " if drive else "all drives "
+    if step['ok']:
+        retried = f", {step['attempts']} attempts" if step['attempts'] > 1 else ""
+        print(f"      ✅ {label}{step['step']} ({step['ms']:.0f} ms{retried})")
+    else:
+        print(f"      ⚠️ {label}{step['step']} failed after {step['attempts']} attempts: {step['error']}")
+
+
+def print_summary(report):
+    for drive, result in report['drives'].items():
+        timings = ', '.join(f"{step['step']} {step['ms']:.0f}ms" for step in result['steps'])
+        print(f"   {'✅' if result['ok'] else '⚠️'} {drive} {result['ms']:.0f} ms ({timings})")
+    print(f"{'🎉' if report['ok'] else '⚠️'} {report['mode']} finished for {len(report['drives'])} drives "
+          f"in {report['elapsed']:.2f}s")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    mode = 'fix_access' if '--fix-access' in sys.argv else 'full_reset'
+    if not args:
+        print("Usage: remediation.py <drive>... [--fix-access] [--dry-run]")
+        sys.exit(1)
+    runner = FakeCommandRunner() if '--dry-run' in sys.argv else None
+    print(f"🛠️ Releasing {', '.join(drive_root(d) for d in args)} ({mode})...")
+    result = ReleaseEngine(runner).release(args, mode, progress=print_step)
+    print_summary(result)
+    if runner is not None:
+        for call, script in runner.calls:
+            print(f"   $ {' '.join(call)}" + (f" <<< {script.strip()!r}" if script else ""))
+    sys.exit(0 if result['ok'] else 2)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Per-Bus Read Scheduler
+"""
+import itertools
+import sys
+import threading
+import time
+from protector import PRIORITY_BACKGROUND, PRIORITY_VERIFY
+
+DEFAULT_MAX_READERS = 1  # one bulk reader per shared link beats several thrashing it
+BURST_SECONDS = 0.25
+
+
+class FakeTopology:
+    """Fixed identity -> bus path map, for tests and benchmarks"""
+    def __init__(self, buses=None):
+        self.buses = {identity: tuple(path) for identity, path in (buses or {}).items()}
+
+    def add(self, identity, *path):
+        self.buses[identity] = tuple(path)
+
+    def bus_path(self, identity):
+        return self.buses.get(identity, ())
+
+
+class InventoryTopology:
+    """Bus paths as recorded by the device inventory (controller, root hub, hubs)"""
+    def __init__(self, inventory):
+        self.inventory = inventory
+
+    def bus_path(self, identity):
+        record = self.inventory.get(identity)
+        return record.bus if record else ()
+
+
+class Bus:
+    def __init__(self, name, max_readers, bandwidth):
+        self.name = name
+        self.max_readers = max_readers
+        self.bandwidth = bandwidth  # bytes/s shared by its readers, None for no limit
+        self.active = []
+        self.bytes = 0
+
+
+class ReadSession:
+    """One job's bulk reads from one device; use as a context manager and
+    call throttle(nbytes) after every read"""
+    def __init__(self, scheduler, identity, buses, priority, name, seq):
+        self.scheduler = scheduler
+        self.identity = identity
+        self.buses = buses
+        self.priority = priority
+        self.name = name
+        self.seq = seq
+        self.active = False
+        self.preempt = False
+        self.preemptions = 0
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.bytes = 0
+        self.waited = 0.0  # queued for a slot
+        self.throttled = 0.0  # sleeping off bandwidth debt
+
+    def throttle(self, nbytes):
+        self.scheduler.throttle(self, nbytes)
+
+    def __enter__(self):
+        self.scheduler.admit(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.scheduler.release(self)
+
+    def to_dict(self):
+        return {
+            'identity': self.identity,
+            'name': self.name,
+            'priority': self.priority,
+            'bytes': self.bytes,
+            'preemptions': self.preemptions,
+            'waited': round(self.waited, 3),
+            'throttled': round(self.throttled, 3),
+            'rate': self.rate,
+        }
+
+
+class BusScheduler:
+    """Admits device readers per shared bus and paces them
+
+    A device's bus path lists every shared link above it (controller, root
+    hub, hubs); a reader needs a free slot on each. Waiters are admitted in
+    (priority, arrival) order, using the protector's priorities. A waiter
+    that outranks a running reader asks it to step aside; the reader yields
+    its slots at its next throttle() call and queues again with its
+    original place. Where a bus has a bandwidth cap, each reader gets an
+    equal share through its own token bucket.
+    """
+    def __init__(self, topology=None, max_readers=DEFAULT_MAX_READERS, bandwidth=None, burst=BURST_SECONDS):
+        self.topology = topology
+        self.max_readers = max_readers  # int, or {bus name: int} with 'default'
+        self.bandwidth = bandwidth  # bytes/s, or {bus name: bytes/s} with 'default'
+        self.burst = burst
+        self.cond = threading.Condition()
+        self.buses = {}
+        self.waiting = []
+        self.sequence = itertools.count()
+
+    @staticmethod
+    def setting(value, name, default):
+        if isinstance(value, dict):
+            return value.get(name, value.get('default', default))
+        return default if value is None else value
+
+    def bus(self, name):
+        bus = self.buses.get(name)
+        if bus is None:
+            bus = self.buses[name] = Bus(name, self.setting(self.max_readers, name, DEFAULT_MAX_READERS),
+                                         self.setting(self.bandwidth, name, None))
+        return bus
+
+    def session(self, identity, priority=PRIORITY_BACKGROUND, name='read'):
+        path = self.topology.bus_path(identity) if self.topology else ()
+        with self.cond:
+            # Unknown topology: the device is at least its own bus (one bulk reader at a time)
+            buses = [self.bus(n) for n in (path or (f"device:{identity}",))]
+            return ReadSession(self, identity, buses, priority, name, next(self.sequence))
+
+    def admit(self, session):
+        started = time.monotonic()
+        with self.cond:
+            self.enqueue(session)
+            self.wait_admitted(session)
+        session.waited += time.monotonic() - started
+
+    def release(self, session):
+        with self.cond:
+            if session in self.waiting:
+                self.waiting.remove(session)
+            self.unlink(session)
+            self.cond.notify_all()  # it may have been holding back waiters behind it
+
+    def throttle(self, session, nbytes):
+        """Account nbytes read, yield to a preempting job, then sleep off any bandwidth debt"""
+        with self.cond:
+            if session.preempt and session.active:
+                session.preemptions += 1
+                self.unlink(session)
+                self.enqueue(session)
+            if not session.active:  # also holds back sibling threads of a preempted session
+                started = time.monotonic()
+                self.wait_admitted(session)
+                session.waited += time.monotonic() - started
+            session.bytes += nbytes
+            for bus in session.buses:
+                bus.bytes += nbytes
+            delay = 0
+            if session.rate:
+                now = time.monotonic()
+                session.tokens = min(session.rate * self.burst, session.tokens + (now - session.updated) * session.rate)
+                session.updated = now
+                session.tokens -= nbytes
+                if session.tokens < 0:
+                    delay = -session.tokens / session.rate
+        if delay:
+            session.throttled += delay
+            time.sleep(delay)
+
+    # Everything below runs with self.cond held
+
+    def enqueue(self, session):
+        self.waiting.append(session)
+        for bus in session.buses:
+            if len(bus.active) >= bus.max_readers and not any(s.preempt for s in bus.active):
+                victims = [s for s in bus.active if s.priority > session.priority]
+                if victims:
+                    max(victims, key=lambda s: (s.priority, s.seq)).preempt = True
+
+    def can_admit(self, session):
+        if any(len(bus.active) >= bus.max_readers for bus in session.buses):
+            return False
+        rank = (session.priority, session.seq)
+        return not any(
+            (other.priority, other.seq) < rank and any(bus in other.buses for bus in session.buses)
+            for other in self.waiting
+        )
+
+    def wait_admitted(self, session):
+        while not session.active:
+            if session in self.waiting and self.can_admit(session):
+                self.waiting.remove(session)
+                for bus in session.buses:
+                    bus.active.append(session)
+                session.active = True
+                session.preempt = False
+                session.tokens = 0.0
+                session.updated = time.monotonic()
+                self.rebalance(session.buses)
+                self.cond.notify_all()
+            else:
+                self.cond.wait()
+
+    def unlink(self, session):
+        if not session.active:
+            return
+        for bus in session.buses:
+            bus.active.remove(session)
+        session.active = False
+        self.rebalance(session.buses)
+        self.cond.notify_all()
+
+    def rebalance(self, buses):
+        """Equal bandwidth shares: each reader gets its tightest bus's share"""
+        for session in {s for bus in buses for s in bus.active}:
+            shares = [bus.bandwidth / len(bus.active) for bus in session.buses if bus.bandwidth]
+            session.rate = min(shares) if shares else None
+
+    def status(self):
+        """Per-bus snapshot for the dashboard"""
+        with self.cond:
+            return [{
+                'bus': bus.name,
+                'max_readers': bus.max_readers,
+                'bandwidth': bus.bandwidth,
+                'bytes': bus.bytes,
+                'active': [s.to_dict() for s in bus.active],
+                'waiting': [s.to_dict() for s in self.waiting if bus in s.buses],
+            } for bus in self.buses.values()]
+
+
+if __name__ == "__main__":
+    # Demo on a fake hub: two background readers share 40 MB/s, then an urgent one preempts
+    rate = float(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 40 * 1024 * 1024
+    topology = FakeTopology({'stick-a': ('usb1', 'hub-1-1'), 'stick-b': ('usb1', 'hub-1-1'),
+                             'stick-c': ('usb1', 'hub-1-1')})
+    scheduler = BusScheduler(topology, max_readers=2, bandwidth=rate)
+    chunk = 1024 * 1024
+    results = {}
+
+    def reader(identity, priority, seconds, delay=0):
+        time.sleep(delay)
+        started = time.monotonic()
+        with scheduler.session(identity, priority, 'demo') as session:
+            while time.monotonic() - started < seconds:
+                session.throttle(chunk)
+        results[identity] = session.to_dict()
+
+    threads = [threading.Thread(target=reader, args=('stick-a', PRIORITY_BACKGROUND, 3)),
+               threading.Thread(target=reader, args=('stick-b', PRIORITY_BACKGROUND, 3)),
+               threading.Thread(target=reader, args=('stick-c', PRIORITY_VERIFY, 1, 1))]
+    print(f"🚦 Three readers on one hub, 2 slots, {rate / 1024 / 1024:.0f} MB/s shared...")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for identity, stats in sorted(results.items()):
+        print(f"   {identity}: {stats['bytes'] / 1024 / 1024:.0f} MB, queued {stats['waited']:.2f}s, "
+              f"throttled {stats['throttled']:.2f}s, preempted {stats['preemptions']}x")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Keyword Search
+"""
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from hasher import iter_files
+from manifest import relative
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# Images and large files are split into regions so every process gets work
+DEFAULT_REGION_SIZE = 64 * 1024 * 1024
+# Small files are grouped into one task until they add up to this much
+FILE_BATCH_BYTES = 16 * 1024 * 1024
+FILE_BATCH_COUNT = 512
+# Regex matches longer than this can be missed where they cross a chunk boundary
+MAX_REGEX_MATCH = 1024
+DEFAULT_MAX_HITS = 10000
+CONTEXT_BYTES = 32
+ENCODINGS = ('utf-8', 'utf-16-le')
+PRINTABLE = bytes(c if 32 <= c < 127 else ord('.') for c in range(256))
+
+_patterns = None  # per worker process, compiled once by init_worker
+
+
+class PatternSet:
+    """Literal keywords and regexes matched together over each chunk in memory
+
+    Keywords (in every requested encoding) are joined into one alternation,
+    longest first, so they cost a single scan of the chunk whatever their
+    number; each regex gets its own scan of the same chunk. Only the
+    pattern sources are pickled to the worker processes.
+    """
+    def __init__(self, keywords=(), regexes=(), ignore_case=True, encodings=ENCODINGS):
+        self.keywords = tuple(k for k in keywords if k)
+        self.regexes = tuple(r for r in regexes if r)
+        if not self.keywords and not self.regexes:
+            raise ValueError("No search patterns given")
+        self.ignore_case = ignore_case
+        self.encodings = tuple(encodings)
+        flags = re.IGNORECASE if ignore_case else 0
+        self.literals = {}  # encoded keyword (case-folded when ignoring case) -> (keyword, encoding)
+        for keyword in self.keywords:
+            for encoding in self.encodings:
+                encoded = keyword.encode(encoding)
+                self.literals.setdefault(encoded.lower() if ignore_case else encoded, (keyword, encoding))
+        self.literal_re = None
+        if self.literals:
+            # Case-folding the chunk once and matching exactly is ~10x faster than re.IGNORECASE
+            alternation = b'|'.join(re.escape(k) for k in sorted(self.literals, key=len, reverse=True))
+            self.literal_re = re.compile(alternation)
+        # Bad regexes fail here, in the caller, not in a worker process
+        self.compiled = [(source, re.compile(source.encode('utf-8'), flags)) for source in self.regexes]
+        longest = max((len(k) for k in self.literals), default=1)
+        self.overlap = max(longest - 1, MAX_REGEX_MATCH if self.regexes else 0)
+
+    def __reduce__(self):
+        return (PatternSet, (self.keywords, self.regexes, self.ignore_case, self.encodings))
+
+    def scan(self, data, limit):
+        """(start, end, pattern, kind, encoding) for matches starting before limit"""
+        if self.literal_re is not None:
+            folded = data.lower() if self.ignore_case else data  # same length, so offsets still line up
+            for m in self.literal_re.finditer(folded):
+                if m.start() >= limit:
+                    break
+                keyword, encoding = self.literals[m.group()]
+                yield m.start(), m.end(), keyword, 'keyword', encoding
+        for source, compiled in self.compiled:
+            for m in compiled.finditer(data):
+                if m.start() >= limit:
+                    break
+                yield m.start(), m.end(), source, 'regex', None
+
+
+def init_worker(patterns, chunk_size, max_hits):
+    global _patterns
+    _patterns = (patterns, chunk_size, max_hits)
+
+
+def open_source(path):
+    """Readable, seekable view of a raw image, device or file (segmented images decompressed on the fly)"""
+    if path.endswith('.fsi'):
+        from segmented_image import SegmentedImageReader
+        return SegmentedImageReader(path)
+    return open(path, 'rb', buffering=0)
+
+
+def search_stream(f, start, length, label, hits, max_hits):
+    """Search length bytes of f from start in chunks; each read runs `overlap` bytes
+    past the chunk so a match crossing into the next chunk is still seen whole"""
+    patterns, chunk_size, _ = _patterns
+    position, end = start, start + length
+    scanned = 0
+    reported = {}  # (pattern, encoding) -> end of its last reported match
+    behind = min(start, patterns.overlap)
+    if behind:
+        # The previous region reported matches crossing into this one whole: look back to skip their tails
+        f.seek(start - behind)
+        data = f.read(behind + patterns.overlap)
+        for s, e, pattern, kind, encoding in patterns.scan(data, behind):
+            key = (pattern, encoding)
+            reported[key] = max(reported.get(key, start), start - behind + e)
+    while position < end:
+        f.seek(position)
+        step = min(chunk_size, end - position)
+        data = f.read(step + patterns.overlap)
+        if not data:
+            break
+        for s, e, pattern, kind, encoding in sorted(patterns.scan(data, step), key=lambda m: m[0]):
+            key = (pattern, encoding)
+            if position + s < reported.get(key, start):
+                continue  # tail of a match already reported whole from the previous chunk's overlap
+            reported[key] = position + e
+            if len(hits) >= max_hits:
+                return scanned
+            context = data[max(0, s - CONTEXT_BYTES):e + CONTEXT_BYTES]
+            hits.append({
+                'path': label,
+                'offset': position + s,
+                'pattern': pattern,
+                'kind': kind,
+                'encoding': encoding,
+                'match': data[s:min(e, s + 200)].translate(PRINTABLE).decode('ascii'),
+                'context': context.translate(PRINTABLE).decode('ascii'),
+            })
+        scanned += min(step, len(data))
+        position += step
+    return scanned
+
+
+def search_task(task):
+    """Worker-process side: run one task, return (hits, bytes scanned, files, errors)"""
+    _, _, max_hits = _patterns
+    hits, errors = [], []
+    scanned = files = 0
+    kind = task[0]
+    items = task[1] if kind == 'files' else [task[1:]]
+    for path, label, start, length in items:
+        try:
+            with open_source(path) as f:
+                scanned += search_stream(f, start, length, label, hits, max_hits)
+            files += kind == 'files'
+        except (OSError, ValueError) as e:
+            errors.append((label, str(e)))
+    return hits, scanned, files, errors
+
+
+class KeywordSearcher:
+    """Streams files or raw images through a process pool; hits are yielded as tasks finish"""
+    def __init__(self, keywords=(), regexes=(), ignore_case=True, encodings=ENCODINGS, processes=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, region_size=DEFAULT_REGION_SIZE, max_hits=DEFAULT_MAX_HITS):
+        self.patterns = PatternSet(keywords, regexes, ignore_case, encodings)
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.region_size = max(region_size, chunk_size)
+        self.max_hits = max_hits
+        self.stats = {}
+
+    def regions(self, path, label, size):
+        for start in range(0, size, self.region_size):
+            yield ('region', path, label, start, min(self.region_size, size - start))
+
+    def volume_tasks(self, root):
+        """Small files in batches, large ones split into regions"""
+        batch, batch_bytes = [], 0
+        for path in iter_files(root):
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            label = relative(root, path)
+            if size > self.region_size:
+                yield from self.regions(path, label, size)
+                continue
+            batch.append((path, label, 0, size))
+            batch_bytes += size
+            if batch_bytes >= FILE_BATCH_BYTES or len(batch) >= FILE_BATCH_COUNT:
+                yield ('files', batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            yield ('files', batch)
+
+    def image_tasks(self, path):
+        with open_source(path) as f:
+            size = f.seek(0, os.SEEK_END)
+        return self.regions(path, os.path.basename(path), size)
+
+    def search_volume(self, root, device=None):
+        """Every file below root; hit offsets are within the file"""
+        return self.run(self.volume_tasks(root), device or root)
+
+    def search_image(self, path, device=None):
+        """A raw (.dd), segmented (.fsi) image or device; hit offsets are within the image"""
+        return self.run(self.image_tasks(path), device or os.path.basename(path))
+
+    def run(self, tasks, device):
+        started = time.perf_counter()
+        self.stats = {'bytes': 0, 'files': 0, 'hits': 0, 'errors': [], 'truncated': False}
+        pool = ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker,
+                                   initargs=(self.patterns, self.chunk_size, self.max_hits))
+        in_flight = set()
+        tasks = iter(tasks)
+        try:
+            while True:
+                for task in tasks:
+                    in_flight.add(pool.submit(search_task, task))
+                    if len(in_flight) >= self.processes * 2:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    hits, scanned, files, errors = future.result()
+                    self.stats['bytes'] += scanned
+                    self.stats['files'] += files
+                    self.stats['errors'] += errors
+                    for hit in hits:
+                        if self.stats['hits'] >= self.max_hits:
+                            self.stats['truncated'] = True
+                            return
+                        self.stats['hits'] += 1
+                        hit['device'] = device
+                        yield hit
+        finally:
+            # Also reached when the consumer stops early (client went away)
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown()  # at most the tasks already running, each one region
+            elapsed = time.perf_counter() - started
+            self.stats['elapsed'] = elapsed
+            self.stats['mb_per_s'] = self.stats['bytes'] / (1024 * 1024) / elapsed if elapsed > 0 else 0
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) < 2:
+        print("Usage: search.py <directory|image.dd|image.fsi> <keyword>... [--regex=<pattern>] [--case]")
+        sys.exit(1)
+    target = args[0]
+    regexes = [a.split('=', 1)[1] for a in sys.argv if a.startswith('--regex=')]
+    searcher = KeywordSearcher(args[1:], regexes, ignore_case='--case' not in sys.argv)
+    print(f"🔎 Searching {target} for {len(args) - 1} keywords, {len(regexes)} regexes...")
+    results = searcher.search_volume(target) if os.path.isdir(target) else searcher.search_image(target)
+    for hit in results:
+        print(f"   {hit['path']} @ {hit['offset']}: {hit['pattern']!r} ...{hit['context']}...")
+    stats = searcher.stats
+    for path, error in stats['errors'][:20]:
+        print(f"   ⚠️ {path}: {error}")
+    print(f"✅ {stats['hits']} hits in {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"({stats['elapsed']:.2f}s, {stats['mb_per_s']:.1f} MB/s)")
+    if stats['truncated']:
+        print(f"   ⚠️ Stopped at {searcher.max_hits} hits")
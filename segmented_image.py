@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Segmented Compressed Evidence Images
+"""
+import hashlib
+import io
+import json
+import lzma
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+FORMAT = 'fsi'
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_SEGMENT_SIZE = 2 * 1024 * 1024 * 1024
+CODECS = ('zlib', 'lzma')
+# segment number, offset in segment, stored length, uncompressed length, flags, sha256 of the data
+ENTRY = struct.Struct('<IQIIB32s')
+FLAG_COMPRESSED = 1
+
+
+def segment_path(path, number):
+    return f"{path}.{number:03d}"
+
+
+def table_path(path):
+    return path + '.tbl'
+
+
+def compress_chunk(codec, level, data):
+    """Worker-process side: hash and compress one chunk (kept raw if it doesn't shrink)"""
+    digest = hashlib.sha256(data).digest()
+    if codec == 'lzma':
+        packed = lzma.compress(data, preset=level)
+    else:
+        packed = zlib.compress(data, level)
+    if len(packed) >= len(data):
+        return data, 0, digest
+    return packed, FLAG_COMPRESSED, digest
+
+
+def decompress_chunk(codec, data):
+    return lzma.decompress(data) if codec == 'lzma' else zlib.decompress(data)
+
+
+class SegmentedImageWriter:
+    """Writes an image as compressed chunks spread over fixed-size segment files
+
+    `path` is a small JSON descriptor; chunks go to path.000, path.001, ...
+    and one fixed-size entry per chunk to path.tbl, so chunk N is located by
+    a single seek. Chunks are compressed in a process pool, in order, with a
+    bounded number in flight.
+    """
+    format = FORMAT
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, segment_size=DEFAULT_SEGMENT_SIZE,
+                 codec='zlib', level=6, processes=None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.segment_size = segment_size
+        self.codec = codec
+        self.level = level
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.processes)
+        self.in_flight = deque()
+        self.max_in_flight = self.processes * 2
+        self.pending = bytearray()
+        self.size = 0
+        self.stored = 0
+        self.chunks = 0
+        self.segments = []
+        self.segment = None
+        self.segment_offset = 0
+        self.table = open(table_path(path), 'wb')
+
+    def write(self, data):
+        self.pending += data  # copies out of the caller's (reused) buffer
+        self.size += len(data)
+        while len(self.pending) >= self.chunk_size:
+            self.submit(bytes(self.pending[:self.chunk_size]))
+            del self.pending[:self.chunk_size]
+
+    def submit(self, chunk):
+        self.in_flight.append((len(chunk), self.pool.submit(compress_chunk, self.codec, self.level, chunk)))
+        while len(self.in_flight) > self.max_in_flight:
+            self.store(*self.in_flight.popleft())
+
+    def store(self, length, future):
+        data, flags, digest = future.result()
+        if self.segment is None or (self.segment_offset and self.segment_offset + len(data) > self.segment_size):
+            self.next_segment()
+        self.table.write(ENTRY.pack(len(self.segments) - 1, self.segment_offset, len(data), length, flags, digest))
+        self.segment.write(data)
+        self.segment_offset += len(data)
+        self.stored += len(data)
+        self.chunks += 1
+
+    def next_segment(self):
+        if self.segment is not None:
+            self.sync(self.segment)
+        name = segment_path(self.path, len(self.segments))
+        self.segments.append(os.path.basename(name))
+        self.segment = open(name, 'wb')
+        self.segment_offset = 0
+
+    @staticmethod
+    def sync(f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+    def close(self, hashes=None):
+        """Finish pending chunks and write the descriptor with the whole-image hashes"""
+        try:
+            if self.pending:
+                self.submit(bytes(self.pending))
+                self.pending = bytearray()
+            while self.in_flight:
+                self.store(*self.in_flight.popleft())
+        finally:
+            self.pool.shutdown()
+        if self.segment is None:
+            self.next_segment()  # empty image still gets its first segment
+        self.sync(self.segment)
+        self.sync(self.table)
+        table_hash = hashlib.sha256()
+        with open(table_path(self.path), 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                table_hash.update(block)
+        descriptor = {
+            'format': FORMAT,
+            'version': VERSION,
+            'size': self.size,
+            'stored': self.stored,
+            'chunk_size': self.chunk_size,
+            'chunks': self.chunks,
+            'codec': self.codec,
+            'level': self.level,
+            'segment_size': self.segment_size,
+            'segments': self.segments,
+            'table': os.path.basename(table_path(self.path)),
+            'table_sha256': table_hash.hexdigest(),
+            'hashes': hashes or {},
+        }
+        temp = self.path + '.tmp'
+        with open(temp, 'w') as f:
+            json.dump(descriptor, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+        return descriptor
+
+
+class SegmentedImageReader(io.RawIOBase):
+    """Seekable file object over a segmented image; reads only the chunks they touch"""
+    def __init__(self, path, cache_chunks=8):
+        super().__init__()
+        with open(path) as f:
+            self.descriptor = json.load(f)
+        if self.descriptor.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a segmented image")
+        directory = os.path.dirname(path)
+        self.size = self.descriptor['size']
+        self.chunk_size = self.descriptor['chunk_size']
+        self.codec = self.descriptor['codec']
+        self.table = open(os.path.join(directory, self.descriptor['table']), 'rb')
+        self.segment_names = [os.path.join(directory, name) for name in self.descriptor['segments']]
+        self.segment_files = {}
+        self.cache = OrderedDict()
+        self.cache_chunks = cache_chunks
+        self.position = 0
+
+    def entry(self, index):
+        """Table entry for chunk `index`: one seek, no scan"""
+        self.table.seek(index * ENTRY.size)
+        return ENTRY.unpack(self.table.read(ENTRY.size))
+
+    def raw_chunk(self, index):
+        segment, offset, stored, length, flags, digest = self.entry(index)
+        f = self.segment_files.get(segment)
+        if f is None:
+            f = self.segment_files[segment] = open(self.segment_names[segment], 'rb')
+        f.seek(offset)
+        return f.read(stored), length, flags, digest
+
+    def read_chunk(self, index, verify=False):
+        data = self.cache.get(index)
+        if data is not None:
+            self.cache.move_to_end(index)
+            return data
+        packed, length, flags, digest = self.raw_chunk(index)
+        data = decompress_chunk(self.codec, packed) if flags & FLAG_COMPRESSED else packed
+        if len(data) != length or (verify and hashlib.sha256(data).digest() != digest):
+            raise IOError(f"Chunk {index} is corrupt")
+        self.cache[index] = data
+        if len(self.cache) > self.cache_chunks:
+            self.cache.popitem(last=False)
+        return data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.position = offset
+        return offset
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, b):
+        view = memoryview(b).cast('B')
+        done = 0
+        while done < len(view) and self.position < self.size:
+            index, start = divmod(self.position, self.chunk_size)
+            data = self.read_chunk(index)
+            n = min(len(data) - start, len(view) - done)
+            view[done:done + n] = data[start:start + n]
+            done += n
+            self.position += n
+        return done
+
+    def verify(self):
+        """Check every chunk digest and the whole-image hashes in one sequential pass"""
+        started = time.perf_counter()
+        digests = {name: hashlib.new(name) for name in self.descriptor['hashes']}
+        bad_chunks = []
+        for index in range(self.descriptor['chunks']):
+            packed, length, flags, digest = self.raw_chunk(index)
+            try:
+                data = decompress_chunk(self.codec, packed) if flags & FLAG_COMPRESSED else packed
+            except (zlib.error, lzma.LZMAError):
+                data = b''
+            if len(data) != length or hashlib.sha256(data).digest() != digest:
+                bad_chunks.append(index)
+                data = bytes(length)  # keep offsets aligned for the whole-image hash
+            for d in digests.values():
+                d.update(data)
+        mismatched = [name for name, d in digests.items() if d.hexdigest() != self.descriptor['hashes'][name]]
+        return {
+            'ok': not bad_chunks and not mismatched,
+            'chunks': self.descriptor['chunks'],
+            'bad_chunks': bad_chunks,
+            'mismatched_hashes': mismatched,
+            'elapsed': time.perf_counter() - started,
+        }
+
+    def close(self):
+        if not self.closed:
+            self.table.close()
+            for f in self.segment_files.values():
+                f.close()
+        super().close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('info', 'verify', 'extract'):
+        print("Usage: segmented_image.py info|verify <image.fsi>")
+        print("       segmented_image.py extract <image.fsi> <out.dd>")
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    with SegmentedImageReader(path) as image:
+        d = image.descriptor
+        if command == 'info':
+            ratio = d['stored'] / d['size'] * 100 if d['size'] else 100
+            print(f"💽 {path}: {d['size']} bytes in {d['chunks']} chunks, {len(d['segments'])} segments")
+            print(f"   Codec: {d['codec']} level {d['level']}, stored {d['stored']} bytes ({ratio:.1f}%)")
+            for name, digest in d['hashes'].items():
+                print(f"   {name}: {digest}")
+        elif command == 'verify':
+            print(f"🔍 Verifying {path}...")
+            result = image.verify()
+            if result['ok']:
+                print(f"✅ IMAGE INTACT ({result['chunks']} chunks in {result['elapsed']:.2f}s)")
+            else:
+                print(f"❌ IMAGE CORRUPT: chunks {result['bad_chunks'][:20]}, hashes {result['mismatched_hashes']}")
+                sys.exit(2)
+        else:
+            with open(sys.argv[3], 'wb') as out:
+                while True:
+                    block = image.read(DEFAULT_CHUNK_SIZE * 4)
+                    if not block:
+                        break
+                    out.write(block)
+            print(f"✅ Extracted {d['size']} bytes to {sys.argv[3]}")
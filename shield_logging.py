@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Non-Blocking Structured Logging
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_DIR = 'logs'
+JSON_LOG = 'forensic_shield.jsonl'
+STRUCTURED_FIELDS = ('device', 'step', 'duration_ms')
+
+_listeners = {}
+_options = {}  # logger name -> (log_dir, console) its listener was built with
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, including device/step/duration fields when present"""
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Console output: display messages as-is, plain log records with time and level"""
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        if getattr(record, 'display', False):
+            return record.getMessage()
+        return super().format(record)
+
+
+def build_handlers(log_dir, console):
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    file_handler = logging.FileHandler(os.path.join(log_dir, JSON_LOG), encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+    return handlers
+
+
+def setup_logging(name='forensic_shield', log_dir=LOG_DIR, console=True):
+    """Attach a QueueHandler to `name`; a background listener does all the I/O
+
+    Callers only pay for enqueueing a record, so a slow console or disk never
+    delays the protection path. Calling again with other options swaps the
+    listener's handlers; records already queued go out through the old ones.
+    """
+    logger = logging.getLogger(name)
+    options = (os.path.abspath(log_dir), bool(console))
+    if name in _listeners:
+        if _options[name] != options:
+            listener = _listeners[name]
+            listener.stop()  # drains the queue through the current handlers
+            for handler in listener.handlers:
+                handler.close()
+            listener.handlers = tuple(build_handlers(log_dir, console))
+            _options[name] = options
+            listener.start()
+        return logger
+
+    handlers = build_handlers(log_dir, console)
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+    _options[name] = options
+    atexit.register(listener.stop)  # drain what's queued before the process exits
+
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    return logger
+
+
+def flush_logging(name='forensic_shield'):
+    """Stop and restart the listener, which drains everything queued so far"""
+    listener = _listeners.get(name)
+    if listener is not None:
+        listener.stop()
+        listener.start()
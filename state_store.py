@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Versioned State Store
+"""
+import json
+import threading
+
+
+class Snapshot:
+    """Immutable view of the state at one version; serialized JSON is cached on it"""
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self.rendered = {}
+
+    def render(self, name, build, variant=None):
+        """JSON bytes for one endpoint, built at most once per (snapshot, variant)"""
+        cached = self.rendered.get(name)
+        if cached is not None and cached[0] == variant:
+            return cached[1]
+        body = json.dumps(build(self.data)).encode()
+        self.rendered[name] = (variant, body)
+        return body
+
+
+class StateStore:
+    """Copy-on-write state: readers grab the current snapshot without locking
+
+    Writers are serialized, copy the top-level dict, apply their change and
+    publish a new snapshot with the next version. Updates must replace nested
+    lists/dicts rather than mutate them, since older snapshots share them.
+    """
+    def __init__(self, initial):
+        self.write_lock = threading.Lock()
+        self.current = Snapshot(1, dict(initial))
+
+    def get(self):
+        return self.current
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def update(self, change=None, **values):
+        """Apply change(data) and/or key=value assignments; returns the new snapshot"""
+        with self.write_lock:
+            data = dict(self.current.data)
+            if change is not None:
+                change(data)
+            data.update(values)
+            snapshot = Snapshot(self.current.version + 1, data)
+            self.current = snapshot  # single reference swap publishes it atomically
+        return snapshot
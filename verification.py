@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Forensic Shield - Non-Destructive Protection Verification
+"""
+import os
+import sys
+import threading
+import time
+from blockdev import get_readonly, is_mount_readonly
+
+FILE_READ_ONLY_VOLUME = 0x00080000
+DEFAULT_TTL = 30
+
+
+class LinuxStateProbe:
+    """Reads BLKROGET and the mount's ST_RDONLY flag; never writes"""
+    name = 'linux'
+
+    def read_only_state(self, device, mountpoint):
+        block = mount = None
+        if device and device.startswith('/dev/'):
+            try:
+                block = get_readonly(device)
+            except OSError:
+                pass
+        if mountpoint:
+            try:
+                mount = is_mount_readonly(mountpoint)
+            except OSError:
+                pass
+        return block, mount
+
+
+class WindowsStateProbe:
+    """Reads the volume's FILE_READ_ONLY_VOLUME flag (set by diskpart readonly)"""
+    name = 'windows'
+
+    def read_only_state(self, device, mountpoint):
+        try:
+            import ctypes
+            flags = ctypes.c_uint32()
+            ok = ctypes.windll.kernel32.GetVolumeInformationW(
+                ctypes.c_wchar_p(mountpoint or device), None, 0, None, None, ctypes.byref(flags), None, 0
+            )
+            return None, (bool(flags.value & FILE_READ_ONLY_VOLUME) if ok else None)
+        except Exception:
+            return None, None
+
+
+class FakeStateProbe:
+    """Test probe: read-only state is whatever the test says it is"""
+    name = 'fake'
+
+    def __init__(self, states=None):
+        self.states = dict(states or {})
+        self.calls = 0
+
+    def set(self, device, block=None, mount=None):
+        self.states[device] = (block, mount)
+
+    def read_only_state(self, device, mountpoint):
+        self.calls += 1
+        return self.states.get(device, (None, None))
+
+
+def get_state_probe():
+    if sys.platform == 'win32':
+        return WindowsStateProbe()
+    return LinuxStateProbe()
+
+
+class ProtectionVerifier:
+    """Answers "is this device protected?" from OS state, cached per device identity"""
+    def __init__(self, probe=None, ttl=DEFAULT_TTL, count_files=True):
+        self.probe = probe or get_state_probe()
+        self.ttl = ttl
+        self.count_files = count_files
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def check(self, record, refresh=False):
+        """Return the protection state of a DeviceRecord, from cache while it is fresh"""
+        now = time.monotonic()
+        if not refresh:
+            cached = self.cache.get(record.identity)
+            if cached is not None and cached[0] > now:
+                result = dict(cached[1])
+                result['cached'] = True
+                return result
+
+        result = self.probe_record(record)
+        with self.lock:
+            self.cache[record.identity] = (now + self.ttl, result)
+        return dict(result)
+
+    def probe_record(self, record):
+        read_access = True
+        files = None
+        if self.count_files:
+            try:
+                files = len(os.listdir(record.mountpoint))
+            except OSError:
+                read_access = False
+        block, mount = self.probe.read_only_state(record.device, record.mountpoint)
+        known = [flag for flag in (block, mount) if flag is not None]
+        return {
+            'identity': record.identity,
+            'read_access': read_access,
+            'files': files,
+            'block_readonly': block,
+            'mount_readonly': mount,
+            'write_protected': bool(known) and all(known),
+            'checked_at': time.time(),
+            'probe': self.probe.name,
+            'cached': False,
+        }
+
+    def invalidate(self, identity):
+        """Drop the cached state (device event, protection just applied, ...)"""
+        with self.lock:
+            self.cache.pop(identity, None)
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()